@@ -0,0 +1,150 @@
+import json
+import logging
+import operator
+import threading
+import time
+import tomllib
+import urllib.request
+from collections import defaultdict
+
+import streamlit as st
+
+import registry
+from spool import Spool
+
+logger = logging.getLogger(__name__)
+
+CHECKS = {
+    "min": (operator.lt, "{field} {value} below {limit}"),
+    "max": (operator.gt, "{field} {value} above {limit}"),
+    "equals": (operator.eq, "{field} is {value}"),
+}
+
+
+class RuleSet:
+    """Alert thresholds compiled into flat (field, test, limit, message) tuples per model."""
+
+    def __init__(self, config):
+        models = config.get("models", {})
+        default = models.get("default", {})
+        self.compressor_models = dict(config.get("compressors", {}))
+        self._rules = {
+            model: self._compile({**default, **overrides})
+            for model, overrides in models.items()
+        }
+        self._rules.setdefault("default", self._compile(default))
+
+    @staticmethod
+    def _compile(fields):
+        rules = []
+        for field, checks in fields.items():
+            for check, limit in checks.items():
+                if check not in CHECKS:
+                    raise ValueError(f"unknown check {check!r} for {field}")
+                test, message = CHECKS[check]
+                rules.append((field, test, limit, message))
+        return rules
+
+    def evaluate(self, record, model=None):
+        # The registry's model wins; [compressors] in the rules file covers unregistered codes
+        if model is None:
+            model = self.compressor_models.get(record["compressor_code"], "default")
+        alerts = []
+        for field, test, limit, message in self._rules.get(model, self._rules["default"]):
+            value = record.get(field)
+            if value is not None and test(value, limit):
+                alerts.append({
+                    "report_id": record.get("report_id"),
+                    "report_date": record["report_date"],
+                    "compressor_code": record["compressor_code"],
+                    "field": field,
+                    "value": value,
+                    "message": message.format(field=field.replace("_", " "), value=value, limit=limit),
+                })
+        return alerts
+
+
+class Notifier:
+    """Drains the alert outbox periodically, one consolidated message per flush."""
+
+    def __init__(self, outbox, webhook_url=None, interval=60.0):
+        self.outbox = outbox
+        self.webhook_url = webhook_url
+        self.interval = interval
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="alert-notifier", daemon=True)
+        self._thread.start()
+
+    def flush(self):
+        alerts, offset = self.outbox.peek(10000)
+        if not offset:
+            return 0
+        self.send(alerts)
+        self.outbox.discard(offset)
+        return len(alerts)
+
+    def send(self, alerts):
+        # A re-submitted report (same report_id) raises the same alerts again
+        alerts = list({(alert["report_id"], alert["field"]): alert for alert in alerts}.values())
+        by_compressor = defaultdict(list)
+        for alert in alerts:
+            by_compressor[alert["compressor_code"]].append(f"{alert['report_date']}: {alert['message']}")
+        text = "\n".join(
+            f"Compressor {code}:\n  " + "\n  ".join(lines) for code, lines in sorted(by_compressor.items())
+        )
+        if not self.webhook_url:
+            logger.warning("Compressor alerts:\n%s", text)
+            return
+        request = urllib.request.Request(
+            self.webhook_url,
+            data=json.dumps({"text": text, "alerts": alerts}, default=str).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=10):
+            pass
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+
+
+@st.cache_resource
+def get_rules():
+    # Parsed and compiled once per server process
+    path = st.secrets.get("alerts", {}).get("rules_path", "alert_rules.toml")
+    with open(path, "rb") as f:
+        return RuleSet(tomllib.load(f))
+
+
+@st.cache_resource
+def get_outbox():
+    settings = st.secrets.get("alerts", {})
+    outbox = Spool(settings.get("outbox_path", "spool/alerts.jsonl"))
+    Notifier(outbox, settings.get("webhook_url"), float(settings.get("notify_interval", 60.0)))
+    return outbox
+
+
+def check(record):
+    """Evaluate a report against the rules and queue any alerts; never touches the network."""
+    alerts = get_rules().evaluate(record, registry.model_of(record["compressor_code"]))
+    if alerts:
+        get_outbox().append(alerts)
+    return alerts
+
+
+def check_saved(records):
+    """``check()`` for reports that are already stored or spooled; returns (alerts, error).
+
+    A broken rule file or an outbox that cannot be written is logged and returned
+    instead of raised, so it never fails a submission that has been saved.
+    """
+    try:
+        return [alert for record in records for alert in check(record)], None
+    except Exception as e:
+        logger.exception("alert check failed for %d report(s)", len(records))
+        return [], e
@@ -0,0 +1,190 @@
+"""Vectorized drift and anomaly detection over air_compressor_reports.
+
+Every metric is scored per compressor with
+- a rolling z-score against the previous ``window`` readings,
+- an EWMA control chart around a seasonally adjusted baseline: the
+  compressor's own readings around the same date a year earlier, or its
+  previous ``baseline_size`` readings while it has less than a year of history.
+
+``DriftDetector.update`` only needs the rows it has not seen yet: it keeps the
+last year of readings and the running EWMA of each compressor, so a daily
+refresh costs the same however long the history is.
+"""
+import numpy as np
+import pandas as pd
+
+from validation import HOURS_PATTERN
+
+METRICS = ("oil_temperature", "motor_temperature", "pressure", "on_load_hours")
+
+# The year-ago baseline: readings within SEASONAL_WINDOW days of the same date a year earlier
+SEASON = pd.Timedelta(days=365)
+SEASONAL_WINDOW = 45
+
+LOAD_QUERY = """
+SELECT report_id, report_date, created_at, compressor_code, oil_temperature, motor_temperature,
+       pressure, on_load_total_time
+FROM air_compressor_reports
+{where}
+ORDER BY compressor_code, report_date, report_id
+"""
+
+
+def parse_hours(values):
+    """Parse on-load times such as "04", "4.5" or "4:30" into hours (NaN if unreadable)."""
+    parts = pd.Series(values, dtype="string").str.extract(HOURS_PATTERN)
+    hours = pd.to_numeric(parts[0], errors="coerce")
+    minutes = pd.to_numeric(parts[1], errors="coerce").fillna(0)
+    return (hours + minutes / 60).astype(float)
+
+
+def prepare(frame):
+    frame = frame.copy()
+    frame["report_date"] = pd.to_datetime(frame["report_date"])
+    for metric in ("oil_temperature", "motor_temperature", "pressure"):
+        frame[metric] = pd.to_numeric(frame[metric], errors="coerce").astype(float)
+    frame["on_load_hours"] = parse_hours(frame.pop("on_load_total_time"))
+    return frame.sort_values(["compressor_code", "report_date"], kind="stable", ignore_index=True)
+
+
+def load_reports(conn, since=None):
+    """Numeric report columns as a DataFrame, optionally only rows created at or after ``since``."""
+    where, params = "", {}
+    if since is not None:
+        # Insertion time, not report_date: back-dated reports and bulk imports are new rows too
+        where, params = "WHERE created_at >= %(since)s", {"since": since}
+    with conn.cursor() as cur:
+        cur.execute(LOAD_QUERY.format(where=where), params)
+        frame = pd.DataFrame(cur.fetchall(), columns=[column.name for column in cur.description])
+    return prepare(frame)
+
+
+def window_stats(values, lo, hi):
+    """Count, mean and standard deviation of ``values[lo:hi]`` for every pair of bounds, ignoring NaN."""
+    present = ~np.isnan(values)
+    # Prefix sums of count, sum and sum of squares: each window costs O(1)
+    sums = [
+        np.concatenate([[0.0], np.cumsum(a)])
+        for a in (present, np.where(present, values, 0.0), np.where(present, values * values, 0.0))
+    ]
+    n, total, squares = (prefix[hi] - prefix[lo] for prefix in sums)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / n
+        std = np.sqrt(np.maximum(squares - total * mean, 0.0) / (n - 1))
+    return n, mean, std
+
+
+class DriftDetector:
+
+    def __init__(self, window=30, z_threshold=3.0, span=14, limit_width=3.0, baseline_size=30,
+                 overlap=pd.Timedelta(hours=1)):
+        self.window = window
+        self.z_threshold = z_threshold
+        self.span = span
+        self.limit_width = limit_width
+        self.baseline_size = baseline_size
+        # Rows become visible when their transaction commits, which can be well after their
+        # created_at (a long bulk import); every load reaches back this far
+        self.overlap = overlap
+        self.watermark = None
+        self.seen = pd.Series(dtype=object)
+        self.tail = pd.DataFrame()
+        self.ewma = pd.DataFrame(columns=list(METRICS), dtype=float)
+        self.latest = pd.DataFrame()
+
+    def update(self, new):
+        """Score rows not scored yet; returns one scored row per new report.
+
+        ``new`` is typically ``load_reports(conn, since=detector.watermark)``: the rows created
+        since the last update, plus a few already scored, which are dropped by report_id.
+        """
+        new = new[~new["report_id"].isin(self.seen.index)]
+        if new.empty:
+            return new
+
+        combined = pd.concat([self.tail, new.assign(_new=True)], ignore_index=True)
+        combined["_new"] = combined["_new"].fillna(False).astype(bool)
+        combined = combined.sort_values(["compressor_code", "report_date"], kind="stable", ignore_index=True)
+        ewma = self._ewma(combined)
+
+        # combined is sorted by (compressor, date), so one sorted key locates every window
+        codes = combined["compressor_code"].astype("category").cat.codes.to_numpy().astype(np.int64)
+        key = codes * 1_000_000 + combined["report_date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        rows = np.flatnonzero(combined["_new"].to_numpy())
+        first = np.searchsorted(key, codes[rows] * 1_000_000)
+        year_ago = key[rows] - SEASON.days
+        windows = {
+            # The previous `window` readings, for the z-score
+            "rolling": (np.maximum(rows - self.window, first), rows),
+            # Readings around the same date a year earlier, so that summer is compared with last summer
+            "seasonal": (
+                np.searchsorted(key, year_ago - SEASONAL_WINDOW, side="left"),
+                np.searchsorted(key, year_ago + SEASONAL_WINDOW, side="right"),
+            ),
+            # The previous `baseline_size` readings, while there is less than a year of history
+            "recent": (np.maximum(rows - self.baseline_size, first), rows),
+        }
+
+        scored = combined.loc[rows, ["report_id", "report_date", "compressor_code", *METRICS]].copy()
+        lam = 2 / (self.span + 1)
+        for metric in METRICS:
+            values = combined[metric].to_numpy(dtype=float)
+            n, mean, std = window_stats(values, *windows["rolling"])
+            mean[n < max(3, self.window // 3)] = np.nan
+            scored[f"{metric}_z"] = (values[rows] - mean) / np.where(std == 0, np.nan, std)
+
+            seasonal_n, seasonal_mean, seasonal_std = window_stats(values, *windows["seasonal"])
+            recent_n, recent_mean, recent_std = window_stats(values, *windows["recent"])
+            use_seasonal = seasonal_n >= SEASONAL_WINDOW
+            center = np.where(use_seasonal, seasonal_mean, recent_mean)
+            spread = np.where(use_seasonal, seasonal_std, recent_std)
+            center[~use_seasonal & (recent_n < max(3, self.baseline_size // 2))] = np.nan
+            half_width = self.limit_width * spread * np.sqrt(lam / (2 - lam))
+
+            scored[f"{metric}_ewma"] = ewma.loc[scored.index, metric]
+            scored[f"{metric}_anomaly"] = scored[f"{metric}_z"].abs() > self.z_threshold
+            scored[f"{metric}_drift"] = (scored[f"{metric}_ewma"] - center).abs() > half_width
+        scored["anomaly"] = scored[[f"{m}_anomaly" for m in METRICS]].any(axis=1)
+        scored["drifting"] = scored[[f"{m}_drift" for m in METRICS]].any(axis=1)
+
+        # Enough history for the year-ago baseline, and never fewer readings than the rolling windows
+        by_code = combined.groupby("compressor_code")
+        last = by_code["report_date"].transform("max")
+        keep = (combined["report_date"] >= last - SEASON - pd.Timedelta(days=SEASONAL_WINDOW)) | (
+            by_code.cumcount(ascending=False) < max(self.window, self.baseline_size)
+        )
+        self.tail = combined.loc[keep].drop(columns="_new").reset_index(drop=True)
+        self.ewma = pd.concat([self.ewma, ewma.loc[scored.index].groupby(scored["compressor_code"]).last()])
+        self.ewma = self.ewma[~self.ewma.index.duplicated(keep="last")]
+        # A back-dated report is scored, but does not replace a newer latest reading
+        self.latest = pd.concat([self.latest, scored.groupby("compressor_code").tail(1)])
+        self.latest = (
+            self.latest.sort_values(["compressor_code", "report_date"], kind="stable")
+            .groupby("compressor_code").tail(1).reset_index(drop=True)
+        )
+        self.seen = pd.concat([self.seen, new.set_index("report_id")["created_at"]])
+        self.watermark = self.seen.max() - self.overlap
+        self.seen = self.seen[self.seen >= self.watermark]
+        return scored
+
+    def drifting(self):
+        """Latest scored reading of every compressor that is drifting or anomalous."""
+        if self.latest.empty:
+            return self.latest
+        return self.latest[self.latest["drifting"] | self.latest["anomaly"]]
+
+    def _ewma(self, combined):
+        # Continue each compressor's EWMA from its last value by seeding it as a prior row
+        new = combined[combined["_new"]]
+        seeds = self.ewma.reindex(new["compressor_code"].unique()).dropna(how="all")
+        seeds = seeds.rename_axis("compressor_code").reset_index()
+        seeds.index = -1 - np.arange(len(seeds))
+        frame = pd.concat([seeds.assign(_seed=True), new[["compressor_code", *METRICS]].assign(_seed=False)])
+        frame = frame.sort_values(["compressor_code", "_seed"], ascending=[True, False], kind="stable")
+        ewma = (
+            frame.groupby("compressor_code")[list(METRICS)]
+            .ewm(span=self.span, adjust=False, ignore_na=True)
+            .mean()
+            .reset_index(level=0, drop=True)
+        )
+        return ewma[ewma.index >= 0]
@@ -0,0 +1,214 @@
+"""HTTP ingestion API for compressor reports, for HMI panels and scripts.
+
+    python api.py --port 8080
+    python api.py --async-driver          # psycopg 3 asyncio pool instead of psycopg2 threads
+    python api.py --sqlite reports.db     # local stand-in, no PostgreSQL needed
+
+POST /reports takes one report object or a list of them, with the same fields
+and limits as the daily report form. Sending a report_id makes retries safe.
+Concurrent requests are coalesced into shared multi-row INSERTs.
+"""
+import argparse
+import asyncio
+import inspect
+import time
+import uuid
+
+from aiohttp import web
+
+import db
+import metrics
+import spool
+from repository import PostgresRepository, SQLiteRepository
+from validation import validate_record
+
+MAX_REPORTS_PER_REQUEST = 1000
+
+
+async def call(repo, method, *args):
+    # Async repositories are awaited directly; blocking ones run on a worker thread
+    function = getattr(repo, method)
+    if inspect.iscoroutinefunction(function):
+        return await function(*args)
+    return await asyncio.to_thread(function, *args)
+
+
+class InsertBatcher:
+    """Coalesces concurrent requests into multi-row INSERTs run on worker threads."""
+
+    def __init__(self, repo, max_batch=500, linger=0.005, concurrency=8):
+        self.repo = repo
+        self.outage_errors = getattr(repo, "OUTAGE_ERRORS", spool.OUTAGE_ERRORS)
+        self.max_batch = max_batch
+        self.linger = linger
+        self._slots = asyncio.Semaphore(concurrency)
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+
+    async def insert(self, records):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            count = len(items[0][0])
+            deadline = loop.time() + self.linger
+            while count < self.max_batch:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), max(0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                count += len(item[0])
+            # Next batch keeps filling while this one is written
+            await self._slots.acquire()
+            asyncio.create_task(self._flush(items))
+
+    async def _flush(self, items):
+        try:
+            try:
+                inserted = await call(self.repo, "insert_many", [r for records, _ in items for r in records])
+            except self.outage_errors as e:
+                for _, future in items:
+                    future.set_exception(e)
+                return
+            except Exception:
+                # One bad request must not fail the others coalesced with it
+                for records, future in items:
+                    try:
+                        future.set_result(await call(self.repo, "insert_many", records))
+                    except Exception as e:
+                        future.set_exception(e)
+                return
+            for _, future in items:
+                future.set_result(inserted)
+        finally:
+            self._slots.release()
+
+
+class CodeCache:
+
+    def __init__(self, repo, ttl=60.0):
+        self.repo = repo
+        self.ttl = ttl
+        self._codes = None
+        self._loaded_at = None
+
+    async def get(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            try:
+                self._codes = await call(self.repo, "known_codes")
+            except Exception:
+                # Keep validating against the last known codes; with none yet, the caller answers 503
+                if self._loaded_at is None:
+                    raise
+            self._loaded_at = time.monotonic()
+        return self._codes
+
+
+async def post_reports(request):
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="body must be JSON")
+    items = payload if isinstance(payload, list) else [payload]
+    if not items or len(items) > MAX_REPORTS_PER_REQUEST:
+        raise web.HTTPBadRequest(text=f"send between 1 and {MAX_REPORTS_PER_REQUEST} reports")
+
+    try:
+        codes = await request.app["codes"].get()
+    except request.app["batcher"].outage_errors:
+        raise web.HTTPServiceUnavailable(text="database unavailable, retry with the same report_id")
+    records, rejected = [], []
+    for index, raw in enumerate(items):
+        if not isinstance(raw, dict):
+            rejected.append({"index": index, "error": "report must be a JSON object"})
+            continue
+        try:
+            record = validate_record(raw)
+        except ValueError as e:
+            rejected.append({"index": index, "error": str(e)})
+            continue
+        if codes is not None and record["compressor_code"] not in codes:
+            rejected.append({"index": index, "error": f"compressor_code: {record['compressor_code']!r} is not registered"})
+            continue
+        record.setdefault("report_id", str(uuid.uuid4()))
+        records.append(record)
+
+    inserted = set()
+    if records:
+        try:
+            inserted = await request.app["batcher"].insert(records)
+        except request.app["batcher"].outage_errors:
+            raise web.HTTPServiceUnavailable(text="database unavailable, retry with the same report_id")
+
+    report_ids = [record["report_id"] for record in records]
+    return web.json_response(
+        {
+            "accepted": len(records),
+            "inserted": len(inserted.intersection(report_ids)),
+            "report_ids": report_ids,
+            "rejected": rejected,
+        },
+        status=200 if records else 422,
+    )
+
+
+async def health(request):
+    return web.json_response({"status": "ok"})
+
+
+def create_app(repo):
+    app = web.Application(client_max_size=8 * 1024 * 1024)
+    app["codes"] = CodeCache(repo)
+    app["batcher"] = InsertBatcher(repo)
+
+    async def lifecycle(app):
+        if hasattr(repo, "open"):
+            await repo.open()
+        app["batcher"].start()
+        yield
+        await app["batcher"].stop()
+        if hasattr(repo, "open"):
+            await repo.close()
+
+    app.cleanup_ctx.append(lifecycle)
+    app.router.add_post("/reports", post_reports)
+    app.router.add_get("/health", health)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--sqlite", metavar="PATH", help="store reports in a SQLite file instead of PostgreSQL")
+    parser.add_argument("--async-driver", action="store_true", help="use psycopg 3 with an asyncio pool")
+    parser.add_argument("--metrics-port", type=int, default=9109, help="Prometheus endpoint port, 0 to disable")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        repo = SQLiteRepository(args.sqlite)
+    elif args.async_driver:
+        # Optional dependency, only imported when asked for
+        from async_repository import create_async_repository
+        repo = create_async_repository()
+    else:
+        pool = db.create_pool()
+        metrics.watch_pool(pool, "api")
+        repo = PostgresRepository(pool)
+    metrics.start_server(args.metrics_port)
+    web.run_app(create_app(repo), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""asyncio report repository on psycopg 3, for the ingestion API.
+
+Same operations as ``repository.ReportRepository`` but as coroutines, on one
+shared ``AsyncConnectionPool``: an in-flight insert holds a connection, not a
+thread. Needs ``pip install "psycopg[binary,pool]"``.
+"""
+import functools
+import time
+
+import psycopg
+import psycopg.rows
+import psycopg_pool
+import streamlit as st
+
+import db
+import metrics
+import queries
+import repository
+import spool
+
+# Unreachable database, from either driver
+OUTAGE_ERRORS = spool.OUTAGE_ERRORS + (psycopg.OperationalError, psycopg.InterfaceError, psycopg_pool.PoolTimeout)
+
+
+@functools.lru_cache(maxsize=64)
+def insert_query(rows):
+    """Multi-row INSERT for ``rows`` rows; psycopg 3 binds parameters server-side, so no execute_values."""
+    row = "({})".format(", ".join(["%s"] * len(db.REPORT_COLUMNS)))
+    return db.INSERT_QUERY.replace("%s", ", ".join([row] * rows))
+
+
+class AsyncPostgresRepository:
+
+    OUTAGE_ERRORS = OUTAGE_ERRORS
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    async def open(self):
+        await self._pool.open()
+
+    async def close(self):
+        await self._pool.close()
+
+    async def insert(self, record):
+        return record["report_id"] in await self.insert_many([record])
+
+    async def insert_many(self, records, page_size=500):
+        """Insert reports in one transaction; returns the set of report_ids that were new.
+
+        Pages are sent in pipeline mode, so a large batch costs one round trip
+        rather than one per page.
+        """
+        rows = [[record[column] for column in db.REPORT_COLUMNS] for record in records]
+        inserted = set()
+        with metrics.submit():
+            checkout = time.perf_counter()
+            async with self._pool.connection() as conn:
+                metrics.POOL_WAIT_SECONDS.observe(time.perf_counter() - checkout)
+                with metrics.timed(metrics.INSERT_SECONDS):
+                    async with conn.pipeline():
+                        cursors = []
+                        for start in range(0, len(rows), page_size):
+                            page = rows[start:start + page_size]
+                            cur = conn.cursor()
+                            await cur.execute(insert_query(len(page)), [value for row in page for value in row])
+                            cursors.append(cur)
+                    for cur in cursors:
+                        inserted.update(str(report_id) for (report_id,) in await cur.fetchall())
+                with metrics.timed(metrics.COMMIT_SECONDS):
+                    await conn.commit()
+        metrics.REPORTS.inc(len(inserted))
+        return inserted
+
+    async def history(self, compressor_code, start, end, after=None, limit=50):
+        query, params = queries.history_query(compressor_code, start, end, after, limit)
+        async with self._pool.connection() as conn:
+            async with conn.cursor(row_factory=psycopg.rows.dict_row) as cur:
+                await cur.execute(query, params)
+                return await cur.fetchall()
+
+    async def latest(self, compressor_code):
+        async with self._pool.connection() as conn:
+            async with conn.cursor(row_factory=psycopg.rows.dict_row) as cur:
+                await cur.execute(repository.LATEST_QUERY, (compressor_code,))
+                return await cur.fetchone()
+
+    async def known_codes(self):
+        async with self._pool.connection() as conn:
+            cur = await conn.execute("SELECT code FROM compressors")
+            return {code for (code,) in await cur.fetchall()}
+
+
+def create_async_repository():
+    settings = st.secrets["database"]
+    pool = psycopg_pool.AsyncConnectionPool(
+        psycopg.conninfo.make_conninfo(
+            host=settings["host"],
+            port=settings["port"],
+            dbname=settings["dbname"],
+            user=settings["user"],
+            password=settings["password"],
+            connect_timeout=int(settings.get("connect_timeout", 5)),
+        ),
+        min_size=int(settings.get("pool_min_size", 1)),
+        max_size=int(settings.get("async_pool_max_size", 20)),
+        timeout=float(settings.get("pool_timeout", 30.0)),
+        open=False,
+    )
+    return AsyncPostgresRepository(pool)
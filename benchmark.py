@@ -0,0 +1,139 @@
+"""Compare plain and prepared statements for the report INSERT and the history page.
+
+    python benchmark.py --submits 2000 --batch-size 500
+
+Runs against the [database] in .streamlit/secrets.toml. Every insert happens
+inside a transaction that is rolled back, so no reports are left behind.
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+import psycopg2.extras
+
+import db
+import queries
+
+SAMPLE_REPORT = {
+    "report_date": date.today(),
+    "operational_status": "15kW Compressor Operational",
+    "oil_temperature": 75,
+    "pressure": 0.72,
+    "on_load_total_time": 4.0,
+    "motor_temperature": 60,
+    "inverter_condition": "ok",
+    "hmi_status": "Autoloadings on",
+    "compressor_fan": "ok",
+    "cleaning": "ok",
+    "air_tank_water_drain": "ok",
+}
+
+# The history page as a prepared statement, to measure it against the plain query it replaces
+HISTORY_FIRST_PAGE = db.PreparedStatement(
+    "benchmark_history_page",
+    ["text", "date", "date", "integer"],
+    queries.history_query("", None, None)[0].replace("%(compressor_code)s", "$1")
+    .replace("%(start)s", "$2").replace("%(end)s", "$3").replace("%(limit)s", "$4"),
+)
+
+
+def plain_insert(cur, records):
+    rows = [tuple(record[column] for column in db.REPORT_COLUMNS) for record in records]
+    psycopg2.extras.execute_values(cur, db.INSERT_QUERY, rows, page_size=len(rows), fetch=True)
+
+
+def prepared_insert(cur, records):
+    db.INSERT_STATEMENT.execute(cur, [[record[column] for record in records] for column in db.REPORT_COLUMNS])
+    cur.fetchall()
+
+
+def plain_history(cur, compressor_code, start, end):
+    cur.execute(*queries.history_query(compressor_code, start, end))
+    cur.fetchall()
+
+
+def prepared_history(cur, compressor_code, start, end):
+    HISTORY_FIRST_PAGE.execute(cur, (compressor_code, start, end, 50))
+    cur.fetchall()
+
+
+def timed(calls, function, *args):
+    durations = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        function(*args)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def report(label, durations, rows=1):
+    total = sum(durations)
+    print(
+        f"{label:<28} median {statistics.median(durations) * 1000:7.3f} ms"
+        f"  p95 {statistics.quantiles(durations, n=20)[-1] * 1000:7.3f} ms"
+        f"  {len(durations) * rows / total:9.0f} rows/s"
+    )
+
+
+def planning_ms(cur, statement):
+    # Server-side planning time of one execution, from EXPLAIN ANALYZE
+    cur.execute("EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) " + statement)
+    return cur.fetchone()[0][0]["Planning Time"]
+
+
+def records(compressor_code, count):
+    return [{**SAMPLE_REPORT, "compressor_code": compressor_code, "report_id": str(uuid.uuid4())} for _ in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submits", type=int, default=2000, help="single-report inserts per mode")
+    parser.add_argument("--batch-size", type=int, default=500, help="reports per batch insert")
+    parser.add_argument("--batches", type=int, default=50)
+    parser.add_argument("--compressor", default="1008", help="a registered compressor code")
+    args = parser.parse_args(argv)
+
+    conn = db.connect()
+    end = date.today()
+    start = end - timedelta(days=90)
+    try:
+        with conn.cursor() as cur:
+            # Warm up: prepare the statements and load the catalog caches
+            prepared_insert(cur, records(args.compressor, 1))
+            prepared_history(cur, args.compressor, start, end)
+            conn.rollback()
+
+            for label, function in (("plain", plain_insert), ("prepared", prepared_insert)):
+                report(f"{label} single insert", timed(args.submits, lambda: function(cur, records(args.compressor, 1))))
+                conn.rollback()
+                batch = lambda: function(cur, records(args.compressor, args.batch_size))
+                report(f"{label} batch insert", timed(args.batches, batch), rows=args.batch_size)
+                conn.rollback()
+
+            report("plain history page", timed(args.submits, plain_history, cur, args.compressor, start, end))
+            report("prepared history page", timed(args.submits, prepared_history, cur, args.compressor, start, end))
+
+            record = records(args.compressor, 1)[0]
+            row = tuple(record[column] for column in db.REPORT_COLUMNS)
+            plain_sql = db.INSERT_QUERY.replace("%s", cur.mogrify("%s", (row,)).decode())
+            prepared_sql = cur.mogrify(db.INSERT_STATEMENT.execute_sql, [[value] for value in row]).decode()
+            history_sql = cur.mogrify(*queries.history_query(args.compressor, start, end)).decode()
+            prepared_history_sql = cur.mogrify(
+                HISTORY_FIRST_PAGE.execute_sql, (args.compressor, start, end, 50)
+            ).decode()
+            for label, statement in (
+                ("plain insert", plain_sql),
+                ("prepared insert", prepared_sql),
+                ("plain history page", history_sql),
+                ("prepared history page", prepared_history_sql),
+            ):
+                print(f"{label:<28} planning {planning_ms(cur, statement):7.3f} ms")
+            conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
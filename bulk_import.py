@@ -0,0 +1,167 @@
+"""Bulk-load historical compressor logs (CSV or Excel) with COPY.
+
+    python bulk_import.py logs_2019.xlsx --rejects rejected.csv
+"""
+import argparse
+import csv
+import io
+import sys
+from pathlib import Path
+
+import db
+from validation import submission_id, validate_record
+
+# The report columns of a log file; report_id is optional
+COPY_COLUMNS = tuple(column for column in db.REPORT_COLUMNS if column != "report_id")
+
+# Straight into the table, report_id from its column default: for new rows only (synthetic.py)
+COPY_QUERY = "COPY air_compressor_reports ({}) FROM STDIN WITH (FORMAT csv)".format(
+    ", ".join(COPY_COLUMNS)
+)
+
+# Seeds the report_id of rows without one: the same row always gets the same id,
+# so importing a file twice, or two overlapping files, loads each report once
+IMPORT_NAMESPACE = "6f1d3c2e-8a4b-5e7f-9c0d-2b4a6e8f1a3c"
+
+STAGING_TABLE = "bulk_import_staging"
+STAGING_COLUMNS = ("report_id", *COPY_COLUMNS)
+
+# COPY cannot skip conflicting rows, so chunks are copied into a temporary table first
+CREATE_STAGING_QUERY = (
+    f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ON COMMIT DROP AS "
+    f"SELECT {', '.join(STAGING_COLUMNS)} FROM air_compressor_reports WITH NO DATA"
+)
+
+STAGING_COPY_QUERY = f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+# Reports already stored under the same report_id are skipped
+MERGE_QUERY = f"""
+INSERT INTO air_compressor_reports ({", ".join(STAGING_COLUMNS)})
+SELECT {", ".join(STAGING_COLUMNS)} FROM {STAGING_TABLE}
+ON CONFLICT DO NOTHING
+"""
+
+
+def _header(names):
+    return [str(name or "").strip().lower().replace(" ", "_") for name in names]
+
+
+def read_csv(f):
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = _header(next(reader, []))
+    for values in reader:
+        if any(values):
+            yield dict(zip(header, values))
+
+
+def read_excel(f):
+    try:
+        import openpyxl
+    except ImportError:
+        raise RuntimeError("Excel import requires openpyxl (pip install openpyxl)") from None
+
+    # read_only streams rows instead of loading the whole workbook
+    workbook = openpyxl.load_workbook(f, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _header(next(rows, []))
+        for values in rows:
+            if any(value is not None for value in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(f, name):
+    if Path(name).suffix.lower() in (".xlsx", ".xlsm"):
+        return read_excel(f)
+    return read_csv(f)
+
+
+def _copy(cur, buffer):
+    """Load one chunk through the staging table; returns the number of new reports."""
+    buffer.seek(0)
+    cur.copy_expert(STAGING_COPY_QUERY, buffer)
+    cur.execute(MERGE_QUERY)
+    inserted = cur.rowcount
+    cur.execute(f"TRUNCATE {STAGING_TABLE}")
+    return inserted
+
+
+def import_rows(conn, rows, chunk_size=50000):
+    """COPY the valid rows in chunks; return (loaded count, skipped count, [(line, row, error)]).
+
+    Rows whose report_id is already stored, including repeats within the file, are skipped.
+    """
+    loaded = 0
+    copied = 0
+    rejected = []
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+
+    with conn.cursor() as cur:
+        cur.execute(CREATE_STAGING_QUERY)
+
+        # Unknown codes would fail the foreign key and abort the whole COPY
+        cur.execute("SELECT code FROM compressors")
+        known_codes = {code for (code,) in cur.fetchall()}
+
+        # Line 1 is the header
+        for line, row in enumerate(rows, start=2):
+            try:
+                record = validate_record(row)
+            except ValueError as e:
+                rejected.append((line, row, str(e)))
+                continue
+            if record["compressor_code"] not in known_codes:
+                rejected.append((line, row, f"compressor_code: {record['compressor_code']!r} is not registered"))
+                continue
+            if "report_id" not in record:
+                record["report_id"] = submission_id(IMPORT_NAMESPACE, record)
+            writer.writerow(record[column] for column in STAGING_COLUMNS)
+            pending += 1
+            if pending >= chunk_size:
+                loaded += _copy(cur, buffer)
+                copied += pending
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        if pending:
+            loaded += _copy(cur, buffer)
+            copied += pending
+
+    return loaded, copied - loaded, rejected
+
+
+def write_rejects(f, rejected):
+    writer = csv.writer(f)
+    writer.writerow(["line", "error", *STAGING_COLUMNS])
+    for line, row, error in rejected:
+        writer.writerow([line, error, *(row.get(column, "") for column in STAGING_COLUMNS)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV or .xlsx file with the air_compressor_reports columns")
+    parser.add_argument("--rejects", help="write rejected rows to this CSV file")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per COPY")
+    args = parser.parse_args(argv)
+
+    # One transaction: either every valid row is loaded or none is
+    with open(args.path, "rb") as f, db.connection() as conn:
+        loaded, skipped, rejected = import_rows(conn, read_rows(f, args.path), args.chunk_size)
+
+    print(f"Loaded {loaded} rows, skipped {skipped} already imported, rejected {len(rejected)}")
+    if rejected:
+        if args.rejects:
+            with open(args.rejects, "w", newline="", encoding="utf-8") as f:
+                write_rejects(f, rejected)
+        else:
+            write_rejects(sys.stderr, rejected[:20])
+    return 1 if rejected and not loaded and not skipped else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
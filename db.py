@@ -0,0 +1,253 @@
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.pool
+import streamlit as st
+
+import metrics
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    pass
+
+
+class ConnectionPool:
+    """Bounded, thread-safe psycopg2 connection pool.
+
+    Connections idle for longer than ``check_after`` seconds are pinged on
+    checkout and transparently replaced if the server has dropped them.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30.0, check_after=30.0):
+        if min_size > max_size:
+            raise ValueError("min_size must not exceed max_size")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = deque()
+        self._in_use = 0
+        for _ in range(min_size):
+            try:
+                self._idle.append((connect(), time.monotonic()))
+            except psycopg2.OperationalError:
+                # Server unreachable at startup: connect lazily on checkout
+                break
+
+    def getconn(self):
+        conn = self._checkout()
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def _checkout(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f"no connection available after {self.timeout}s (max_size={self.max_size})"
+            )
+        try:
+            while True:
+                with self._lock:
+                    conn, last_used = self._idle.pop() if self._idle else (None, None)
+                if conn is None:
+                    return self._connect()
+                if self._healthy(conn, last_used):
+                    return conn
+                self._close(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, discard=False):
+        with self._lock:
+            self._in_use -= 1
+        try:
+            if not discard and not conn.closed:
+                try:
+                    if conn.status != psycopg2.extensions.STATUS_READY:
+                        conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            if discard or conn.closed:
+                self._close(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection, committing on success and rolling back on error."""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+            conn.commit()
+        except BaseException as e:
+            discard = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def stats(self):
+        with self._lock:
+            return {"idle": len(self._idle), "in_use": self._in_use}
+
+    def closeall(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn, _ in idle:
+            self._close(conn)
+
+    def _healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+def connect():
+    settings = st.secrets["database"]
+    return psycopg2.connect(
+        host=settings["host"],
+        port=settings["port"],
+        dbname=settings["dbname"],
+        user=settings["user"],
+        password=settings["password"],
+        # Bounds the connect itself; the pool timeout only bounds waiting for a free slot
+        connect_timeout=int(settings.get("connect_timeout", 5)),
+    )
+
+
+def create_pool():
+    settings = st.secrets["database"]
+    return ConnectionPool(
+        connect,
+        min_size=int(settings.get("pool_min_size", 1)),
+        max_size=int(settings.get("pool_max_size", 10)),
+        timeout=float(settings.get("pool_timeout", 30.0)),
+        check_after=float(settings.get("pool_check_after", 30.0)),
+    )
+
+
+# One pool per Streamlit server process, shared by every session
+get_pool = st.cache_resource(create_pool)
+
+
+def connection():
+    return get_pool().connection()
+
+
+# Column -> PostgreSQL type, in INSERT order
+REPORT_COLUMN_TYPES = {
+    "report_id": "uuid",
+    "report_date": "date",
+    "compressor_code": "text",
+    "operational_status": "text",
+    "oil_temperature": "integer",
+    "pressure": "numeric",
+    "on_load_total_time": "numeric",
+    "motor_temperature": "integer",
+    "inverter_condition": "equipment_condition",
+    "hmi_status": "text",
+    "compressor_fan": "equipment_condition",
+    "cleaning": "equipment_condition",
+    "air_tank_water_drain": "equipment_condition",
+}
+
+REPORT_COLUMNS = tuple(REPORT_COLUMN_TYPES)
+
+# Prepared statements already created, per connection; PREPARE survives rollbacks
+_prepared = weakref.WeakKeyDictionary()
+
+
+class PreparedStatement:
+    """A statement PREPAREd on each connection the first time it runs there, then run by name.
+
+    ``query`` uses $1, $2, ... for the parameters, whose types are ``param_types``.
+    """
+
+    def __init__(self, name, param_types, query):
+        self.name = name
+        self.prepare_sql = f"PREPARE {name} ({', '.join(param_types)}) AS {query}"
+        # The casts turn psycopg2's ARRAY['...'] text literals into the declared types
+        self.execute_sql = f"EXECUTE {name} ({', '.join(f'%s::{t}' for t in param_types)})"
+
+    def execute(self, cur, params):
+        prepared = _prepared.setdefault(cur.connection, set())
+        if self.name not in prepared:
+            cur.execute(self.prepare_sql)
+            prepared.add(self.name)
+        cur.execute(self.execute_sql, params)
+
+
+# Multi-row INSERT as plain SQL, for drivers that prepare statements themselves
+INSERT_QUERY = (
+    "INSERT INTO air_compressor_reports ({}) VALUES %s ON CONFLICT DO NOTHING RETURNING report_id"
+    .format(", ".join(REPORT_COLUMNS))
+)
+
+# One array per column, so a single prepared statement fits any number of rows.
+# Reports already committed under the same report_id are skipped.
+INSERT_STATEMENT = PreparedStatement(
+    "insert_reports",
+    [f"{column_type}[]" for column_type in REPORT_COLUMN_TYPES.values()],
+    "INSERT INTO air_compressor_reports ({}) SELECT * FROM unnest({}) ON CONFLICT DO NOTHING RETURNING report_id".format(
+        ", ".join(REPORT_COLUMNS), ", ".join(f"${i}" for i in range(1, len(REPORT_COLUMNS) + 1))
+    ),
+)
+
+
+def insert_reports(conn, records, page_size=500):
+    """Insert records with the prepared INSERT, one execution per page; returns the set of new report_ids."""
+    inserted = set()
+    with conn.cursor() as cur:
+        for start in range(0, len(records), page_size):
+            page = records[start:start + page_size]
+            with metrics.timed(metrics.INSERT_SECONDS):
+                INSERT_STATEMENT.execute(cur, [[record[column] for record in page] for column in REPORT_COLUMNS])
+                inserted.update(report_id for (report_id,) in cur.fetchall())
+    return inserted
+
+
+_version_lock = threading.Lock()
+_data_version = 0
+
+
+def data_version():
+    # Passed to st.cache_data functions so new submissions invalidate cached reads
+    return _data_version
+
+
+def reports_changed():
+    # Call after committing new reports
+    global _data_version
+    with _version_lock:
+        _data_version += 1
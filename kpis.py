@@ -0,0 +1,250 @@
+"""Per-compressor KPI rollups by day, week and month, kept up to date incrementally.
+
+    python kpis.py refresh                   # recompute what changed since the last refresh
+    python kpis.py rebuild --since 2024-01-01
+
+compressor_kpis holds one row per compressor and day, week or month with the
+sums, counts, extremes and "not ok" counts of its reports. A statement trigger
+on air_compressor_reports queues the (compressor, day) pairs touched by every
+INSERT, UPDATE, DELETE or COPY in compressor_kpi_dirty_days; ``refresh()``
+recomputes those days from the reports, then their weeks and months from the
+day rows. KPI pages read the week and month rows only: a year of monthly KPIs
+for the whole fleet is one row per compressor and month.
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+
+import psycopg2.extras
+
+import db
+import migrate
+
+ROLLUP_TABLE = "compressor_kpis"
+DIRTY_TABLE = "compressor_kpi_dirty_days"
+
+TEMPERATURES = ("oil_temperature", "motor_temperature")
+CONDITIONS = ("inverter_condition", "compressor_fan", "cleaning", "air_tank_water_drain")
+
+# Rolled up from the day rows; "day" rows are rolled up from the reports
+BUCKETS = ("week", "month")
+
+# Arbitrary key: refreshes must not interleave, or an older snapshot could overwrite a newer one
+LOCK_KEY = 4360_2025
+
+# Queued (compressor, day) pairs recomputed per transaction
+BATCH_SIZE = 5000
+
+# Column: (aggregate over the reports of a day, aggregate over the day rows of a week or month)
+MEASURES = {
+    "reports": ("count(*)", "sum"),
+    **{
+        column: measure
+        for metric in TEMPERATURES
+        for column, measure in (
+            (f"{metric}_count", (f"count({metric})", "sum")),
+            (f"{metric}_sum", (f"sum({metric})", "sum")),
+            (f"{metric}_max", (f"max({metric})", "max")),
+        )
+    },
+    "pressure_count": ("count(pressure)", "sum"),
+    "pressure_sum": ("sum(pressure)", "sum"),
+    "pressure_min": ("min(pressure)", "min"),
+    "pressure_max": ("max(pressure)", "max"),
+    "on_load_total_time_count": ("count(on_load_total_time)", "sum"),
+    "on_load_total_time_sum": ("sum(on_load_total_time)", "sum"),
+    **{f"{field}_not_ok": (f"count(*) FILTER (WHERE {field} = 'not ok')", "sum") for field in CONDITIONS},
+}
+
+DAY_AGGREGATES = ", ".join(f"{aggregate} AS {column}" for column, (aggregate, _) in MEASURES.items())
+PERIOD_AGGREGATES = ", ".join(f"{combine}({column}) AS {column}" for column, (_, combine) in MEASURES.items())
+
+_UPSERT = f"""
+INSERT INTO {ROLLUP_TABLE} (bucket, compressor_code, period, {", ".join(MEASURES)})
+{{select}}
+ON CONFLICT (bucket, compressor_code, period) DO UPDATE
+SET {", ".join(f"{column} = EXCLUDED.{column}" for column in MEASURES)}, refreshed_at = now()
+"""
+
+# Recomputes the rows listed in ``keys`` (bucket, compressor_code, period) through ``source``, a
+# LATERAL subquery: one index lookup per key. Rows whose reports are all gone are deleted.
+_RECOMPUTE = f"""
+WITH keys AS ({{keys}}
+), totals AS (
+    SELECT keys.bucket, keys.compressor_code, keys.period, agg.*
+    FROM keys CROSS JOIN LATERAL ({{source}}
+    ) agg
+), emptied AS (
+    DELETE FROM {ROLLUP_TABLE} k USING totals
+    WHERE k.bucket = totals.bucket AND k.compressor_code = totals.compressor_code
+      AND k.period = totals.period AND coalesce(totals.reports, 0) = 0
+)
+{_UPSERT.format(select=f"SELECT bucket, compressor_code, period, {', '.join(MEASURES)} FROM totals WHERE totals.reports > 0")}
+"""
+
+RECOMPUTE_DAYS_QUERY = _RECOMPUTE.format(
+    keys="""
+    SELECT 'day' AS bucket, compressor_code, period
+    FROM unnest(%(codes)s::text[], %(days)s::date[]) AS d (compressor_code, period)""",
+    source=f"""
+        SELECT {DAY_AGGREGATES}
+        FROM {migrate.TABLE} r
+        WHERE r.compressor_code = keys.compressor_code AND r.report_date = keys.period""",
+)
+
+RECOMPUTE_PERIODS_QUERY = _RECOMPUTE.format(
+    keys="""
+    SELECT DISTINCT b.bucket, d.compressor_code, date_trunc(b.bucket, d.day)::date AS period
+    FROM unnest(%(codes)s::text[], %(days)s::date[]) AS d (compressor_code, day)
+    CROSS JOIN unnest(%(buckets)s::text[]) AS b (bucket)""",
+    source=f"""
+        SELECT {PERIOD_AGGREGATES}
+        FROM {ROLLUP_TABLE} d
+        WHERE d.bucket = 'day' AND d.compressor_code = keys.compressor_code
+          AND d.period >= keys.period AND d.period < (keys.period + ('1 ' || keys.bucket)::interval)::date""",
+)
+
+# One statement, so the pairs it removes are exactly those committed before its snapshot;
+# pairs queued by transactions that commit later stay for the next refresh
+DEQUEUE_QUERY = f"""
+WITH dirty AS (
+    DELETE FROM {DIRTY_TABLE}
+    WHERE ctid IN (SELECT ctid FROM {DIRTY_TABLE} LIMIT %(batch_size)s)
+    RETURNING compressor_code, report_date
+)
+SELECT compressor_code, report_date FROM dirty
+"""
+
+REBUILD_DAYS_QUERY = _UPSERT.format(select=f"""
+SELECT 'day', compressor_code, report_date, {DAY_AGGREGATES}
+FROM {migrate.TABLE}
+WHERE report_date >= %(start)s AND report_date < %(end)s AND compressor_code IS NOT NULL
+GROUP BY compressor_code, report_date""")
+
+REBUILD_PERIODS_QUERY = _UPSERT.format(select=f"""
+SELECT %(bucket)s, compressor_code, date_trunc(%(bucket)s, period)::date, {PERIOD_AGGREGATES}
+FROM {ROLLUP_TABLE}
+WHERE bucket = 'day' AND period >= %(start)s AND period < %(end)s
+GROUP BY 2, 3""")
+
+
+def period_start(day, bucket):
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    return migrate.month_start(day)
+
+
+def next_period(start, bucket):
+    if bucket == "week":
+        return start + timedelta(days=7)
+    return migrate.add_months(start, 1)
+
+
+def refresh(conn, batch_size=BATCH_SIZE):
+    """Recompute the queued days and their weeks and months, one transaction per batch.
+
+    Returns the number of (compressor, day) pairs recomputed.
+    """
+    recomputed = 0
+    with conn.cursor() as cur:
+        while True:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_KEY,))
+            cur.execute(DEQUEUE_QUERY, {"batch_size": batch_size})
+            queued = cur.fetchall()
+            if queued:
+                codes, days = zip(*set(queued))
+                params = {"codes": list(codes), "days": list(days), "buckets": list(BUCKETS)}
+                cur.execute(RECOMPUTE_DAYS_QUERY, params)
+                cur.execute(RECOMPUTE_PERIODS_QUERY, params)
+                recomputed += len(codes)
+            conn.commit()
+            if len(queued) < batch_size:
+                return recomputed
+
+
+def rebuild(conn, since=None):
+    """Recompute everything from ``since`` (default: the first report), one month per transaction.
+
+    Returns the number of day rows written.
+    """
+    with conn.cursor() as cur:
+        if since is None:
+            cur.execute(f"SELECT min(report_date) FROM {migrate.TABLE}")
+            since = cur.fetchone()[0]
+            conn.commit()
+        if since is None:
+            return 0
+        month = migrate.month_start(since)
+        last = migrate.month_start(date.today())
+        days = 0
+        while month <= last:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_KEY,))
+            start, end = max(month, since), migrate.add_months(month, 1)
+            cur.execute(
+                f"DELETE FROM {ROLLUP_TABLE} WHERE bucket = 'day' AND period >= %s AND period < %s", (start, end)
+            )
+            cur.execute(REBUILD_DAYS_QUERY, {"start": start, "end": end})
+            days += cur.rowcount
+            for bucket in BUCKETS:
+                # Every week or month that overlaps [start, end), from all of its days
+                first = period_start(start, bucket)
+                stop = next_period(period_start(end - timedelta(days=1), bucket), bucket)
+                cur.execute(
+                    f"DELETE FROM {ROLLUP_TABLE} WHERE bucket = %s AND period >= %s AND period < %s",
+                    (bucket, first, stop),
+                )
+                cur.execute(REBUILD_PERIODS_QUERY, {"bucket": bucket, "start": first, "end": stop})
+            conn.commit()
+            month = end
+    return days
+
+
+def summary(conn, bucket, start, end, compressor_code=None):
+    """Per-compressor KPIs for each week or month overlapping [start, end], newest first."""
+    if bucket not in BUCKETS:
+        raise ValueError(f"unknown bucket {bucket!r}")
+    temperatures = ",\n           ".join(
+        f"({m}_sum / nullif({m}_count, 0))::float AS {m}_mean, {m}_max" for m in TEMPERATURES
+    )
+    query = f"""
+    SELECT period, compressor_code, reports,
+           {temperatures},
+           (pressure_sum / nullif(pressure_count, 0))::float AS pressure_mean,
+           pressure_min::float AS pressure_min,
+           (on_load_total_time_sum / nullif(on_load_total_time_count, 0))::float AS on_load_hours_mean,
+           {", ".join(f"{field}_not_ok" for field in CONDITIONS)}
+    FROM {ROLLUP_TABLE}
+    WHERE bucket = %(bucket)s AND period BETWEEN %(start)s AND %(end)s
+    """
+    if compressor_code:
+        query += "  AND compressor_code = %(compressor_code)s\n"
+    query += "ORDER BY period DESC, compressor_code"
+    params = {
+        "bucket": bucket, "start": period_start(start, bucket), "end": end, "compressor_code": compressor_code,
+    }
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("refresh", help="recompute the days changed since the last refresh")
+    rebuild_parser = commands.add_parser("rebuild", help="recompute every day, week and month from a date")
+    rebuild_parser.add_argument("--since", type=date.fromisoformat, help="first day (default: the first report)")
+    args = parser.parse_args(argv)
+
+    conn = db.connect()
+    try:
+        if args.command == "refresh":
+            print(f"Recomputed {refresh(conn)} compressor days")
+        else:
+            print(f"Rebuilt {rebuild(conn, args.since)} compressor days")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
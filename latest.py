@@ -0,0 +1,84 @@
+import threading
+import time
+
+import psycopg2.extras
+import streamlit as st
+
+import db
+
+LATEST_QUERY = f"""
+SELECT DISTINCT ON (compressor_code) {", ".join(db.REPORT_COLUMNS)}, created_at
+FROM air_compressor_reports
+{{where}}
+ORDER BY compressor_code, report_date DESC, created_at DESC
+"""
+
+
+class LatestReports:
+    """Most recent report per compressor, refreshed from rows newer than a watermark.
+
+    Rows are re-read from ``overlap`` seconds before the watermark, since a
+    transaction that started earlier may commit after a later one. Deleted
+    reports and edits that keep their created_at are never newer than the
+    watermark, so everything is reloaded every ``reload_interval`` seconds.
+    """
+
+    def __init__(self, pool, refresh_interval=30.0, overlap=300.0, reload_interval=600.0):
+        self._pool = pool
+        self.refresh_interval = refresh_interval
+        self.overlap = overlap
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._watermark = None
+        self._checked_at = None
+        self._reloaded_at = None
+        self._version = None
+
+    def get(self, compressor_code):
+        self.refresh()
+        return self._rows.get(compressor_code)
+
+    def refresh(self):
+        # Local submissions bump db.data_version(), which forces an early refresh
+        with self._lock:
+            version = db.data_version()
+            if (
+                self._checked_at is not None
+                and version == self._version
+                and time.monotonic() - self._checked_at < self.refresh_interval
+            ):
+                return
+            reload = self._reloaded_at is None or time.monotonic() - self._reloaded_at >= self.reload_interval
+            if reload:
+                where, params = "", {}
+            else:
+                where = "WHERE created_at > %(since)s - make_interval(secs => %(overlap)s)"
+                params = {"since": self._watermark, "overlap": self.overlap}
+            with self._pool.connection() as conn:
+                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                    cur.execute(LATEST_QUERY.format(where=where), params)
+                    rows = cur.fetchall()
+            if reload:
+                self._rows, self._watermark = {}, None
+                self._reloaded_at = time.monotonic()
+            for row in rows:
+                current = self._rows.get(row["compressor_code"])
+                if current is None or (row["report_date"], row["created_at"]) >= (
+                    current["report_date"], current["created_at"]
+                ):
+                    self._rows[row["compressor_code"]] = row
+                if self._watermark is None or row["created_at"] > self._watermark:
+                    self._watermark = row["created_at"]
+            self._checked_at = time.monotonic()
+            self._version = version
+
+
+@st.cache_resource
+def get_latest():
+    settings = st.secrets.get("app", {})
+    return LatestReports(
+        db.get_pool(),
+        refresh_interval=float(settings.get("latest_refresh_interval", 30.0)),
+        reload_interval=float(settings.get("latest_reload_interval", 600.0)),
+    )
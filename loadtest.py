@@ -0,0 +1,364 @@
+"""Load test: a shift of technicians submitting reports concurrently.
+
+    python loadtest.py --technicians 50 --reports 100
+    python loadtest.py --path writer --pool-size 5
+    python loadtest.py --path async
+    python loadtest.py --path apptest --technicians 5 --reports 10
+    python loadtest.py --sqlite loadtest.db   # no PostgreSQL needed
+
+Each technician submits reports back to back (or with --think-time between
+them) through one of the submit paths:
+
+    sync     validate, alert check and INSERT, as the form does (default)
+    writer   the write-behind queue; latency is until the report is written
+    async    the psycopg 3 asyncio repository used by api.py --async-driver
+    apptest  the real form page through Streamlit's AppTest, one process per technician
+
+Prints p50/p95/p99 submit latency, throughput and the peak and mean number of
+connections to the database. Reports go to dedicated LOADTEST01..LOADTEST20
+compressors, which are registered for the run and deleted with their reports
+afterwards unless --keep is given. Uses the [database] in
+.streamlit/secrets.toml, or with --sqlite a SQLiteRepository (sync and writer
+paths only; no alert check, since the alert rules look compressors up in
+PostgreSQL).
+"""
+import argparse
+import asyncio
+import csv
+import random
+import statistics
+import sys
+import threading
+import time
+import sqlite3
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, nullcontext
+from datetime import date
+from pathlib import Path
+
+import alerts
+import db
+import writer
+from repository import PostgresRepository, SQLiteRepository
+from validation import submission_id, validate_record
+
+# operational_status of every load-test report, so they can be deleted afterwards
+TAG = "load test"
+
+# Load-test reports only go to these compressors, registered for the run and removed afterwards,
+# so the fleet, compliance, alerts and cached latest reports never mix them with real ones
+CODES = [f"LOADTEST{index:02d}" for index in range(1, 21)]
+
+REGISTER_QUERY = """
+INSERT INTO compressors (code, site) SELECT code, 'Load test' FROM unnest(%s::text[]) AS code
+ON CONFLICT DO NOTHING
+"""
+
+
+def sample_report(rng, codes):
+    # Inside the default alert thresholds, so no alerts are queued
+    return {
+        "report_date": date.today(),
+        "compressor_code": rng.choice(codes),
+        "operational_status": TAG,
+        "oil_temperature": rng.randint(60, 90),
+        "pressure": round(rng.uniform(0.6, 0.8), 2),
+        "on_load_total_time": rng.choice([4.0, 4.5, 8.0]),
+        "motor_temperature": rng.randint(40, 70),
+        "inverter_condition": "ok",
+        "hmi_status": "Autoloadings on",
+        "compressor_fan": "ok",
+        "cleaning": "ok",
+        "air_tank_water_drain": "ok",
+    }
+
+
+def prepare(raw, nonce):
+    # What the form does between the submit click and the INSERT
+    record = validate_record(raw)
+    record["report_id"] = submission_id(nonce, record)
+    return record
+
+
+class ConnectionSampler:
+    """Counts client connections to the database every ``interval`` seconds."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.counts = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="connection-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        conn = db.connect()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                while not self._stop.wait(self.interval):
+                    cur.execute(
+                        "SELECT count(*) - 1 FROM pg_stat_activity"
+                        " WHERE datname = current_database() AND backend_type = 'client backend'"
+                    )
+                    self.counts.append(cur.fetchone()[0])
+        finally:
+            conn.close()
+
+
+def run_threads(technicians, submit):
+    """Run ``submit(technician)`` on one thread per technician; collects their latencies and errors."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def technician(index):
+        try:
+            result = submit(index)
+        except Exception as e:
+            result = ([], [repr(e)])
+        with lock:
+            latencies.extend(result[0])
+            errors.extend(result[1])
+
+    threads = [threading.Thread(target=technician, args=(index,)) for index in range(technicians)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def technician_loop(args, index, submit_one):
+    rng = random.Random(index)
+    nonce = str(uuid.uuid4())
+    latencies, errors = [], []
+    for _ in range(args.reports):
+        if args.think_time:
+            time.sleep(rng.expovariate(1 / args.think_time))
+        raw = sample_report(rng, args.codes)
+        started = time.perf_counter()
+        try:
+            submit_one(raw, nonce)
+        except Exception as e:
+            errors.append(repr(e))
+            continue
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def open_repository(args):
+    """The repository of the sync and writer paths, and the function that closes it."""
+    if args.sqlite:
+        repo = SQLiteRepository(args.sqlite)
+        return repo, repo.close
+    pool = db.ConnectionPool(db.connect, min_size=1, max_size=args.pool_size)
+    return PostgresRepository(pool), pool.closeall
+
+
+def check_alerts(args, record):
+    # The alert rules look the compressor up in PostgreSQL
+    if not args.sqlite:
+        alerts.check_saved([record])
+
+
+def sync_path(args):
+    repo, close = open_repository(args)
+
+    def submit_one(raw, nonce):
+        record = prepare(raw, nonce)
+        repo.insert(record)
+        db.reports_changed()
+        check_alerts(args, record)
+
+    try:
+        return run_threads(args.technicians, lambda index: technician_loop(args, index, submit_one))
+    finally:
+        close()
+
+
+def writer_path(args):
+    repo, close = open_repository(args)
+    report_writer = writer.ReportWriter(repo, batch_size=args.batch_size, linger=args.linger)
+
+    def submit_one(raw, nonce):
+        record = prepare(raw, nonce)
+        ticket = report_writer.submit(record)
+        check_alerts(args, record)
+        while (state := report_writer.status(ticket))[0] == writer.QUEUED:
+            time.sleep(0.002)
+        if state[0] != writer.WRITTEN:
+            raise RuntimeError(f"report {state[0]}: {state[1]}")
+
+    try:
+        return run_threads(args.technicians, lambda index: technician_loop(args, index, submit_one))
+    finally:
+        close()
+
+
+def async_path(args):
+    from async_repository import create_async_repository
+
+    async def technician(repo, index):
+        rng = random.Random(index)
+        nonce = str(uuid.uuid4())
+        latencies, errors = [], []
+        for _ in range(args.reports):
+            if args.think_time:
+                await asyncio.sleep(rng.expovariate(1 / args.think_time))
+            raw = sample_report(rng, args.codes)
+            started = time.perf_counter()
+            try:
+                record = prepare(raw, nonce)
+                await repo.insert(record)
+                alerts.check_saved([record])
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            latencies.append(time.perf_counter() - started)
+        return latencies, errors
+
+    async def main():
+        repo = create_async_repository()
+        await repo.open()
+        try:
+            results = await asyncio.gather(*(technician(repo, index) for index in range(args.technicians)))
+        finally:
+            await repo.close()
+        return [x for result in results for x in result[0]], [x for result in results for x in result[1]]
+
+    return asyncio.run(main())
+
+
+def apptest_technician(args, index):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(index)
+    app = AppTest.from_file(str(Path(__file__).with_name("report.py")), default_timeout=60).run()
+    latencies, errors = [], []
+    for _ in range(args.reports):
+        if args.think_time:
+            time.sleep(rng.expovariate(1 / args.think_time))
+        raw = sample_report(rng, args.codes)
+        app.selectbox[0].set_value(raw["compressor_code"]).run()
+        app.text_input[0].set_value(TAG)
+        app.number_input[0].set_value(raw["oil_temperature"])
+        app.number_input[1].set_value(raw["pressure"])
+        app.number_input[3].set_value(raw["motor_temperature"])
+        for selectbox in app.selectbox[1:]:
+            selectbox.set_value("ok")
+        started = time.perf_counter()
+        app.button[0].click().run()
+        if app.exception or app.error:
+            errors.append(str((app.exception or app.error)[0].value))
+            continue
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def apptest_path(args):
+    # AppTest is not thread-safe: one process (and so one connection pool) per technician
+    with ProcessPoolExecutor(args.technicians) as executor:
+        results = list(executor.map(apptest_technician, [args] * args.technicians, range(args.technicians)))
+    return [x for result in results for x in result[0]], [x for result in results for x in result[1]]
+
+
+PATHS = {"sync": sync_path, "writer": writer_path, "async": async_path, "apptest": apptest_path}
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+def register():
+    with closing(db.connect()) as conn, conn, conn.cursor() as cur:
+        cur.execute(REGISTER_QUERY, (CODES,))
+
+
+def cleanup(args):
+    """Delete the load-test reports, then the load-test compressors; returns the number of reports."""
+    if args.sqlite:
+        if args.sqlite == ":memory:":
+            return 0
+        with closing(sqlite3.connect(args.sqlite)) as conn, conn:
+            return conn.execute(
+                f"DELETE FROM air_compressor_reports WHERE compressor_code IN ({', '.join('?' * len(CODES))})", CODES
+            ).rowcount
+    with closing(db.connect()) as conn, conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM air_compressor_reports WHERE compressor_code = ANY(%s)", (CODES,))
+        deleted = cur.rowcount
+        cur.execute("DELETE FROM compressors WHERE code = ANY(%s)", (CODES,))
+        return deleted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", choices=PATHS, default="sync")
+    parser.add_argument("--technicians", type=int, default=20, help="concurrent simulated technicians")
+    parser.add_argument("--reports", type=int, default=50, help="reports per technician")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds between a technician's reports")
+    parser.add_argument("--pool-size", type=int, default=10, help="max connections (sync and writer paths)")
+    parser.add_argument("--batch-size", type=int, default=200, help="write-behind batch size")
+    parser.add_argument("--linger", type=float, default=0.05, help="write-behind linger, seconds")
+    parser.add_argument("--sqlite", metavar="PATH", help="insert into a SQLite file (or :memory:) instead of PostgreSQL")
+    parser.add_argument("--keep", action="store_true", help="keep the inserted reports")
+    parser.add_argument("--output", help="append the results to this CSV file")
+    args = parser.parse_args(argv)
+
+    if args.sqlite and args.path not in ("sync", "writer"):
+        parser.error("--sqlite only applies to the sync and writer paths")
+    args.codes = CODES
+    if not args.sqlite:
+        register()
+
+    # No server to count connections on with --sqlite
+    sampler = ConnectionSampler()
+    with nullcontext() if args.sqlite else sampler:
+        started = time.perf_counter()
+        latencies, errors = PATHS[args.path](args)
+        elapsed = time.perf_counter() - started
+
+    if not args.keep:
+        print(f"deleted {cleanup(args)} load-test reports")
+    if not latencies:
+        print(f"no report was submitted; first error: {errors[0] if errors else None}")
+        return 1
+
+    result = {
+        "path": f"{args.path}-sqlite" if args.sqlite else args.path,
+        "technicians": args.technicians,
+        "reports": len(latencies),
+        "errors": len(errors),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "reports_per_s": round(len(latencies) / elapsed, 1),
+        "peak_connections": max(sampler.counts, default=0),
+        "mean_connections": round(statistics.fmean(sampler.counts), 1) if sampler.counts else 0,
+    }
+    print(f"{result['path']}: {args.technicians} technicians, {result['reports']} reports, {result['errors']} errors")
+    print(f"latency     p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  max {result['max_ms']} ms")
+    print(f"throughput  {result['reports_per_s']} reports/s over {elapsed:.2f} s")
+    print(f"connections peak {result['peak_connections']}  mean {result['mean_connections']}")
+    if errors:
+        print(f"first error: {errors[0]}")
+
+    if args.output:
+        new_file = not Path(args.output).exists()
+        with open(args.output, "a", newline="") as f:
+            out = csv.DictWriter(f, fieldnames=list(result))
+            if new_file:
+                out.writeheader()
+            out.writerow(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Prometheus metrics for the report submit path, served on a separate port.
+
+    [metrics]
+    port = 9108        # scrape http://<host>:9108/metrics; 0 disables the endpoint
+
+Timings cover the steps where a slow submission can spend its time: waiting
+for a pooled connection, the INSERT itself and the COMMIT.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+import prometheus_client
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# 1 ms to 10 s: a healthy submit is a few ms, a stuck one several seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SUBMIT_SECONDS = prometheus_client.Histogram(
+    "report_submit_seconds", "Time to store a batch of reports, including the pool wait", buckets=LATENCY_BUCKETS
+)
+SUBMITS = prometheus_client.Counter("report_submits", "Report batches submitted to the database")
+REPORTS = prometheus_client.Counter("report_rows_inserted", "New reports inserted (duplicates excluded)")
+FAILURES = prometheus_client.Counter(
+    "report_submit_failures", "Failed report submissions by exception class", ["exception"]
+)
+POOL_WAIT_SECONDS = prometheus_client.Histogram(
+    "db_pool_wait_seconds", "Time to check out a pooled connection for a report INSERT, including connecting",
+    buckets=LATENCY_BUCKETS,
+)
+INSERT_SECONDS = prometheus_client.Histogram(
+    "db_insert_seconds", "Time to execute the report INSERT", buckets=LATENCY_BUCKETS
+)
+COMMIT_SECONDS = prometheus_client.Histogram(
+    "db_commit_seconds", "Time to COMMIT the report INSERT", buckets=LATENCY_BUCKETS
+)
+POOL_CONNECTIONS = prometheus_client.Gauge("db_pool_connections", "Connections in the pool by state", ["pool", "state"])
+
+
+@contextmanager
+def timed(histogram):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started)
+
+
+@contextmanager
+def submit():
+    """Count and time one submission, recording the exception class if it fails."""
+    SUBMITS.inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        FAILURES.labels(type(e).__name__).inc()
+        raise
+    finally:
+        SUBMIT_SECONDS.observe(time.perf_counter() - started)
+
+
+def watch_pool(pool, name="app"):
+    # Read when scraped, so it costs nothing on the submit path
+    POOL_CONNECTIONS.labels(name, "in_use").set_function(lambda: pool.stats()["in_use"])
+    POOL_CONNECTIONS.labels(name, "idle").set_function(lambda: pool.stats()["idle"])
+
+
+def start_server(port):
+    """Serve /metrics from a background thread; returns False if the port is taken or disabled."""
+    if not port:
+        return False
+    try:
+        prometheus_client.start_http_server(port)
+    except OSError as e:
+        # Another server process on this host already serves the metrics
+        logger.warning("metrics endpoint not started on port %s: %s", port, e)
+        return False
+    return True
+
+
+@st.cache_resource
+def serve(_pool=None):
+    # Once per server process
+    if _pool is not None:
+        watch_pool(_pool)
+    return start_server(int(st.secrets.get("metrics", {}).get("port", 9108)))
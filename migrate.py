@@ -0,0 +1,201 @@
+"""Schema management for the maintenance report database.
+
+    python migrate.py                        # apply pending migrations
+    python migrate.py status                 # list applied / pending migrations
+    python migrate.py partitions             # create the next months' partitions
+    python migrate.py detach --before 2019-01-01
+
+Migrations in migrations/ run in file name order and are recorded in
+schema_migrations. A .sql file runs in a single transaction; a .py file
+defines migrate(conn) and manages its own transactions, for changes that
+must be done in batches without holding long locks.
+"""
+import argparse
+import importlib.util
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import db
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+TABLE = "air_compressor_reports"
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_NAME = re.compile(rf"{TABLE}_(\d{{4}})_(\d{{2}})")
+
+# Arbitrary key so concurrent `migrate.py` runs queue up instead of racing
+LOCK_KEY = 4360_2024
+
+
+def migration_files():
+    return sorted(p for p in MIGRATIONS_DIR.iterdir() if p.suffix in (".sql", ".py"))
+
+
+def applied_migrations(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS schema_migrations "
+            "(name text PRIMARY KEY, applied_at timestamptz NOT NULL DEFAULT now())"
+        )
+        cur.execute("SELECT name FROM schema_migrations")
+        names = {name for (name,) in cur.fetchall()}
+    conn.commit()
+    return names
+
+
+def apply(conn, path):
+    if path.suffix == ".sql":
+        with conn.cursor() as cur:
+            cur.execute(path.read_text())
+    else:
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.migrate(conn)
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (path.name,))
+    conn.commit()
+
+
+def migrate(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+    try:
+        done = applied_migrations(conn)
+        for path in migration_files():
+            if path.name not in done:
+                print(f"Applying {path.name}")
+                apply(conn, path)
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+        conn.commit()
+
+
+# Monthly partitions
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_{month:%Y_%m}"
+
+
+def is_partitioned(cur):
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", (TABLE,))
+    return cur.fetchone()[0] == "p"
+
+
+def existing_partitions(cur):
+    cur.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass",
+        (TABLE,),
+    )
+    return {name for (name,) in cur.fetchall()}
+
+
+def create_partition(cur, month, parent=TABLE, default_partition=DEFAULT_PARTITION):
+    name = partition_name(month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    cur.execute(
+        f"SELECT 1 FROM {default_partition} WHERE report_date >= %(start)s AND report_date < %(end)s LIMIT 1",
+        bounds,
+    )
+    if cur.fetchone() is None:
+        cur.execute(
+            f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES FROM (%(start)s) TO (%(end)s)", bounds
+        )
+        return name
+
+    # Rows for this month already landed in the default partition: move them
+    # into a standalone table, then attach it (the CHECK lets ATTACH skip its scan)
+    cur.execute(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cur.execute(
+        f"WITH moved AS (DELETE FROM {default_partition} "
+        f"WHERE report_date >= %(start)s AND report_date < %(end)s RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        bounds,
+    )
+    cur.execute(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+        f"CHECK (report_date >= %(start)s AND report_date < %(end)s)",
+        bounds,
+    )
+    cur.execute(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM (%(start)s) TO (%(end)s)", bounds)
+    cur.execute(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds")
+    return name
+
+
+def ensure_partitions(conn, months_ahead=3, since=None):
+    """Create any missing monthly partitions from ``since`` up to ``months_ahead`` months from now."""
+    created = []
+    with conn.cursor() as cur:
+        if not is_partitioned(cur):
+            raise RuntimeError(f"{TABLE} is not partitioned yet; run `python migrate.py` first")
+        existing = existing_partitions(cur)
+        month = month_start(since or date.today())
+        last = add_months(month_start(date.today()), months_ahead)
+        while month <= last:
+            if partition_name(month) not in existing:
+                created.append(create_partition(cur, month))
+                conn.commit()
+            month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(conn, before):
+    """Detach monthly partitions that end on or before ``before``; the tables are kept."""
+    detached = []
+    with conn.cursor() as cur:
+        existing = existing_partitions(cur)
+        for name in sorted(existing):
+            match = PARTITION_NAME.fullmatch(name)
+            if match and add_months(date(int(match[1]), int(match[2]), 1), 1) <= before:
+                cur.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+                conn.commit()
+                detached.append(name)
+    return detached
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("status", help="list applied and pending migrations")
+    partitions = commands.add_parser("partitions", help="create upcoming monthly partitions")
+    partitions.add_argument("--months-ahead", type=int, default=3)
+    partitions.add_argument("--since", type=date.fromisoformat, help="also create months from this date")
+    detach = commands.add_parser("detach", help="detach monthly partitions older than a date")
+    detach.add_argument("--before", type=date.fromisoformat, required=True)
+    args = parser.parse_args(argv)
+
+    conn = db.connect()
+    try:
+        if args.command == "status":
+            done = applied_migrations(conn)
+            for path in migration_files():
+                print(f"{'applied' if path.name in done else 'pending'}  {path.name}")
+        elif args.command == "partitions":
+            for name in ensure_partitions(conn, args.months_ahead, args.since):
+                print(f"Created {name}")
+        elif args.command == "detach":
+            for name in detach_partitions(conn, args.before):
+                print(f"Detached {name}")
+        else:
+            migrate(conn)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
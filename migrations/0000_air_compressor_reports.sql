@@ -0,0 +1,14 @@
+CREATE TABLE IF NOT EXISTS air_compressor_reports (
+    report_date date NOT NULL,
+    compressor_code text NOT NULL,
+    operational_status text,
+    oil_temperature integer,
+    pressure numeric(4, 2),
+    on_load_total_time text,
+    motor_temperature integer,
+    inverter_condition text,
+    hmi_status text,
+    compressor_fan text,
+    cleaning text,
+    air_tank_water_drain text
+);
@@ -0,0 +1,66 @@
+"""Client-generated report id: replaying a spooled or retried report is a no-op.
+
+Runs without long locks: the column is added without a value (metadata only),
+existing rows get an id in batches of pages, NOT NULL is proven by a CHECK
+validated under a weak lock, and the unique index is built concurrently.
+"""
+from migrate import TABLE
+
+PAGES_PER_BATCH = 1000
+
+INDEX = f"{TABLE}_report_id_key"
+
+
+def migrate(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT is_nullable FROM information_schema.columns WHERE table_name = %s AND column_name = 'report_id'",
+            (TABLE,),
+        )
+        row = cur.fetchone()
+        if row is not None and row[0] == "NO":
+            # Applied by the earlier single-statement version of this migration
+            return
+
+        cur.execute(f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS report_id uuid")
+        # Only rows inserted from now on get the default; no table rewrite
+        cur.execute(f"ALTER TABLE {TABLE} ALTER COLUMN report_id SET DEFAULT gen_random_uuid()")
+        cur.execute("SELECT pg_relation_size(%s::regclass) / current_setting('block_size')::int", (TABLE,))
+        (pages,) = cur.fetchone()
+    conn.commit()
+
+    # Existing rows, a range of pages per transaction (TID range scans); rows moved by the
+    # UPDATE land past the range with their id already set
+    with conn.cursor() as cur:
+        for first in range(0, pages + 1, PAGES_PER_BATCH):
+            cur.execute(
+                f"UPDATE {TABLE} SET report_id = gen_random_uuid() "
+                f"WHERE ctid >= %s::tid AND ctid < %s::tid AND report_id IS NULL",
+                (f"({first},0)", f"({first + PAGES_PER_BATCH},0)"),
+            )
+            conn.commit()
+
+    with conn.cursor() as cur:
+        # VALIDATE takes SHARE UPDATE EXCLUSIVE, so writes continue; SET NOT NULL then skips its scan
+        cur.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_report_id_not_null CHECK (report_id IS NOT NULL) NOT VALID")
+        conn.commit()
+        cur.execute(f"ALTER TABLE {TABLE} VALIDATE CONSTRAINT {TABLE}_report_id_not_null")
+        conn.commit()
+        cur.execute("SET LOCAL lock_timeout = '10s'")
+        cur.execute(f"ALTER TABLE {TABLE} ALTER COLUMN report_id SET NOT NULL")
+        cur.execute(f"ALTER TABLE {TABLE} DROP CONSTRAINT {TABLE}_report_id_not_null")
+        # A failed concurrent build leaves an invalid index behind; start over
+        cur.execute(
+            "SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(%s) AND NOT indisvalid", (INDEX,)
+        )
+        if cur.fetchone():
+            cur.execute(f"DROP INDEX {INDEX}")
+    conn.commit()
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} ON {TABLE} (report_id)")
+    finally:
+        conn.autocommit = False
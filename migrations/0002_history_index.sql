@@ -0,0 +1,3 @@
+-- Serves per-compressor history and keyset pagination ordered by (report_date, report_id)
+CREATE INDEX IF NOT EXISTS air_compressor_reports_code_date_idx
+    ON air_compressor_reports (compressor_code, report_date DESC, report_id DESC);
@@ -0,0 +1,82 @@
+"""Convert air_compressor_reports into a table range-partitioned by month.
+
+Runs online: a trigger mirrors new inserts into the partitioned copy while the
+existing rows are copied one month per transaction, and the final swap is a
+couple of renames. The old table is kept as air_compressor_reports_unpartitioned
+until it is dropped by hand.
+"""
+from datetime import date
+
+from migrate import DEFAULT_PARTITION, TABLE, add_months, create_partition, is_partitioned, month_start
+
+PARTITIONED = f"{TABLE}_partitioned"
+UNPARTITIONED = f"{TABLE}_unpartitioned"
+
+
+def create_partitioned_copy(cur):
+    cur.execute(
+        f"CREATE TABLE {PARTITIONED} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE (report_date)"
+    )
+    # Unique constraints on a partitioned table must include the partition key
+    cur.execute(f"ALTER TABLE {PARTITIONED} ADD CONSTRAINT {PARTITIONED}_report_id_key UNIQUE (report_id, report_date)")
+    cur.execute(
+        f"CREATE INDEX {PARTITIONED}_code_date_idx "
+        f"ON {PARTITIONED} (compressor_code, report_date DESC, report_id DESC)"
+    )
+    cur.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARTITIONED} DEFAULT")
+
+    cur.execute(f"SELECT min(report_date) FROM {TABLE}")
+    month = month_start(cur.fetchone()[0] or date.today())
+    last = add_months(month_start(date.today()), 3)
+    months = []
+    while month <= last:
+        create_partition(cur, month, parent=PARTITIONED)
+        months.append(month)
+        month = add_months(month, 1)
+
+    # Mirror inserts made while the copy runs; ON CONFLICT skips rows copied twice
+    cur.execute(f"""
+        CREATE FUNCTION {PARTITIONED}_mirror() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO {PARTITIONED} SELECT NEW.* ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END $$
+    """)
+    cur.execute(
+        f"CREATE TRIGGER {PARTITIONED}_mirror AFTER INSERT ON {TABLE} "
+        f"FOR EACH ROW EXECUTE FUNCTION {PARTITIONED}_mirror()"
+    )
+    return months
+
+
+def migrate(conn):
+    with conn.cursor() as cur:
+        if is_partitioned(cur):
+            return
+        months = create_partitioned_copy(cur)
+    conn.commit()
+
+    copy = f"INSERT INTO {PARTITIONED} SELECT * FROM {TABLE} WHERE {{}} ON CONFLICT DO NOTHING"
+    with conn.cursor() as cur:
+        for month in months:
+            cur.execute(
+                copy.format("report_date >= %s AND report_date < %s"), (month, add_months(month, 1))
+            )
+            conn.commit()
+        cur.execute(copy.format("report_date IS NULL OR report_date >= %s"), (add_months(months[-1], 1),))
+        conn.commit()
+
+    with conn.cursor() as cur:
+        # Fail fast rather than queue behind long-running queries on the table
+        cur.execute("SET LOCAL lock_timeout = '10s'")
+        cur.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cur.execute(f"DROP TRIGGER {PARTITIONED}_mirror ON {TABLE}")
+        cur.execute(f"DROP FUNCTION {PARTITIONED}_mirror()")
+        cur.execute(f"ALTER TABLE {TABLE} RENAME TO {UNPARTITIONED}")
+        for suffix in ("report_id_key", "code_date_idx"):
+            cur.execute(f"ALTER INDEX IF EXISTS {TABLE}_{suffix} RENAME TO {UNPARTITIONED}_{suffix}")
+        cur.execute(f"ALTER TABLE {PARTITIONED} RENAME TO {TABLE}")
+        cur.execute(f"ALTER TABLE {TABLE} RENAME CONSTRAINT {PARTITIONED}_report_id_key TO {TABLE}_report_id_key")
+        cur.execute(f"ALTER INDEX {PARTITIONED}_code_date_idx RENAME TO {TABLE}_code_date_idx")
+    conn.commit()
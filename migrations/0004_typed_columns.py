@@ -0,0 +1,127 @@
+"""Store on_load_total_time as numeric hours and the condition fields as an enum.
+
+Runs without long locks: typed shadow columns are added (metadata only), a
+trigger keeps them in sync for new writes, existing rows are converted in
+keyset-ordered batches, and the final swap only drops and renames columns.
+Values that cannot be converted become NULL and are kept, with their
+report_id, in air_compressor_reports_untyped_values.
+"""
+from migrate import TABLE
+
+CONDITION_COLUMNS = ("inverter_condition", "compressor_fan", "cleaning", "air_tank_water_drain")
+TYPED = {"on_load_total_time": "numeric(7, 2)", **{c: "equipment_condition" for c in CONDITION_COLUMNS}}
+CONVERT = {
+    "on_load_total_time": "parse_on_load_hours({})",
+    **{c: "parse_equipment_condition({})" for c in CONDITION_COLUMNS},
+}
+
+BATCH_SIZE = 5000
+
+SETUP = f"""
+DO $$ BEGIN
+    CREATE TYPE equipment_condition AS ENUM ('ok', 'not ok');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+-- "04", "4.5" or "4:30" -> hours; NULL if unreadable
+CREATE OR REPLACE FUNCTION parse_on_load_hours(value text) RETURNS numeric
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE WHEN hours < 100000 THEN hours END
+    FROM (
+        SELECT m[1]::numeric + coalesce(m[2]::numeric, 0) / 60 AS hours
+        FROM regexp_match(value, '^\\s*(\\d+(?:\\.\\d+)?)\\s*(?::\\s*(\\d{{1,2}}))?\\s*$') AS m
+    ) parsed
+$$;
+
+CREATE OR REPLACE FUNCTION parse_equipment_condition(value text) RETURNS equipment_condition
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE regexp_replace(lower(trim(value)), '[\\s_]+', ' ', 'g')
+        WHEN 'ok' THEN 'ok'::equipment_condition
+        WHEN 'not ok' THEN 'not ok'::equipment_condition
+    END
+$$;
+
+CREATE TABLE IF NOT EXISTS {TABLE}_untyped_values (
+    report_id uuid NOT NULL,
+    report_date date,
+    column_name text NOT NULL,
+    value text NOT NULL,
+    PRIMARY KEY (report_id, column_name)
+);
+"""
+
+
+def sync_function():
+    assignments = "\n".join(
+        f"""
+    NEW.{column}_typed := {CONVERT[column].format(f"NEW.{column}")};
+    IF NEW.{column} IS NOT NULL AND NEW.{column}_typed IS NULL THEN
+        INSERT INTO {TABLE}_untyped_values VALUES (NEW.report_id, NEW.report_date, '{column}', NEW.{column})
+        ON CONFLICT DO NOTHING;
+    END IF;"""
+        for column in TYPED
+    )
+    return f"""
+CREATE OR REPLACE FUNCTION {TABLE}_typed_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN{assignments}
+    RETURN NEW;
+END $$
+"""
+
+
+def migrate(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = %s AND column_name = 'on_load_total_time'",
+            (TABLE,),
+        )
+        if cur.fetchone()[0] == "numeric":
+            return
+
+        cur.execute(SETUP)
+        for column, sql_type in TYPED.items():
+            cur.execute(f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS {column}_typed {sql_type}")
+        cur.execute(sync_function())
+        cur.execute(f"DROP TRIGGER IF EXISTS {TABLE}_typed_sync ON {TABLE}")
+        cur.execute(
+            f"CREATE TRIGGER {TABLE}_typed_sync BEFORE INSERT OR UPDATE ON {TABLE} "
+            f"FOR EACH ROW EXECUTE FUNCTION {TABLE}_typed_sync()"
+        )
+    conn.commit()
+
+    # Touch every row once, in (report_id, report_date) order; the trigger converts it
+    touch = ", ".join(f"{column} = {column}" for column in TYPED)
+    batch = f"""
+    WITH batch AS (
+        SELECT report_id, report_date FROM {TABLE}
+        WHERE (report_id, report_date) > (%(report_id)s, %(report_date)s)
+        ORDER BY report_id, report_date
+        LIMIT {BATCH_SIZE}
+    ), touched AS (
+        UPDATE {TABLE} t SET {touch}
+        FROM batch
+        WHERE t.report_id = batch.report_id AND t.report_date = batch.report_date
+    )
+    SELECT report_id, report_date FROM batch
+    ORDER BY report_id DESC, report_date DESC
+    LIMIT 1
+    """
+    last = {"report_id": "00000000-0000-0000-0000-000000000000", "report_date": "-infinity"}
+    with conn.cursor() as cur:
+        while True:
+            cur.execute(batch, last)
+            row = cur.fetchone()
+            conn.commit()
+            if row is None:
+                break
+            last = {"report_id": row[0], "report_date": row[1]}
+
+    with conn.cursor() as cur:
+        cur.execute("SET LOCAL lock_timeout = '10s'")
+        cur.execute(f"DROP TRIGGER {TABLE}_typed_sync ON {TABLE}")
+        cur.execute(f"DROP FUNCTION {TABLE}_typed_sync()")
+        for column in TYPED:
+            cur.execute(f"ALTER TABLE {TABLE} DROP COLUMN {column}")
+            cur.execute(f"ALTER TABLE {TABLE} RENAME COLUMN {column}_typed TO {column}")
+    conn.commit()
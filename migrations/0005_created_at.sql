@@ -0,0 +1,8 @@
+-- Insertion time, used as the watermark for incremental cache refreshes.
+-- A constant default is a metadata-only change; existing rows get the migration time.
+ALTER TABLE air_compressor_reports
+    ADD COLUMN IF NOT EXISTS created_at timestamptz NOT NULL DEFAULT now();
+
+-- Rows arrive in created_at order, so a BRIN index stays tiny and cheap to build
+CREATE INDEX IF NOT EXISTS air_compressor_reports_created_at_idx
+    ON air_compressor_reports USING brin (created_at);
@@ -0,0 +1,16 @@
+CREATE TABLE IF NOT EXISTS compressors (
+    code text PRIMARY KEY,
+    rating_kw numeric(6, 1),
+    site text,
+    line text,
+    model text
+);
+
+-- Register every code already used so the foreign key holds; fill in the details afterwards
+INSERT INTO compressors (code)
+SELECT DISTINCT compressor_code FROM air_compressor_reports WHERE compressor_code IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+ALTER TABLE air_compressor_reports
+    ADD CONSTRAINT air_compressor_reports_compressor_code_fkey
+    FOREIGN KEY (compressor_code) REFERENCES compressors (code) ON UPDATE CASCADE;
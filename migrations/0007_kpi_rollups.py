@@ -0,0 +1,77 @@
+"""Per-compressor KPI rollups by day, week and month, see kpis.py.
+
+The trigger is installed before the backfill, so reports inserted while it
+runs are queued and picked up by the next ``kpis.refresh()``. The backfill
+commits one month at a time.
+"""
+import kpis
+from migrate import TABLE
+
+SETUP = f"""
+CREATE TABLE IF NOT EXISTS {kpis.ROLLUP_TABLE} (
+    bucket text NOT NULL CHECK (bucket IN ('day', 'week', 'month')),
+    compressor_code text NOT NULL,
+    period date NOT NULL,
+    reports integer NOT NULL,
+    oil_temperature_count integer NOT NULL,
+    oil_temperature_sum bigint,
+    oil_temperature_max integer,
+    motor_temperature_count integer NOT NULL,
+    motor_temperature_sum bigint,
+    motor_temperature_max integer,
+    pressure_count integer NOT NULL,
+    pressure_sum numeric,
+    pressure_min numeric,
+    pressure_max numeric,
+    on_load_total_time_count integer NOT NULL,
+    on_load_total_time_sum numeric,
+    inverter_condition_not_ok integer NOT NULL,
+    compressor_fan_not_ok integer NOT NULL,
+    cleaning_not_ok integer NOT NULL,
+    air_tank_water_drain_not_ok integer NOT NULL,
+    refreshed_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (bucket, compressor_code, period)
+);
+
+-- Fleet-wide summaries read one bucket over a date range
+CREATE INDEX IF NOT EXISTS {kpis.ROLLUP_TABLE}_period_idx ON {kpis.ROLLUP_TABLE} (bucket, period);
+
+-- Append-only queue: no key, so a pair queued while a refresh runs is never lost to ON CONFLICT
+CREATE TABLE IF NOT EXISTS {kpis.DIRTY_TABLE} (
+    compressor_code text NOT NULL,
+    report_date date NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION {kpis.DIRTY_TABLE}_queue() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {kpis.DIRTY_TABLE}
+        SELECT DISTINCT compressor_code, report_date FROM new_rows
+        WHERE compressor_code IS NOT NULL AND report_date IS NOT NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO {kpis.DIRTY_TABLE}
+        SELECT DISTINCT compressor_code, report_date FROM old_rows
+        WHERE compressor_code IS NOT NULL AND report_date IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END $$;
+
+-- Statement triggers: one queue insert per INSERT or COPY, however many rows it writes
+CREATE OR REPLACE TRIGGER {kpis.DIRTY_TABLE}_insert AFTER INSERT ON {TABLE}
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {kpis.DIRTY_TABLE}_queue();
+CREATE OR REPLACE TRIGGER {kpis.DIRTY_TABLE}_update AFTER UPDATE ON {TABLE}
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {kpis.DIRTY_TABLE}_queue();
+CREATE OR REPLACE TRIGGER {kpis.DIRTY_TABLE}_delete AFTER DELETE ON {TABLE}
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {kpis.DIRTY_TABLE}_queue();
+"""
+
+
+def migrate(conn):
+    with conn.cursor() as cur:
+        cur.execute(SETUP)
+    conn.commit()
+    kpis.rebuild(conn)
@@ -0,0 +1,41 @@
+import io
+
+import streamlit as st
+
+import bulk_import
+import db
+
+st.title("Bulk Import")
+
+st.write(
+    "Upload historical compressor logs as CSV or Excel with the same columns as the daily report. "
+    "Valid rows are loaded with COPY in a single transaction; invalid rows are listed below."
+)
+
+uploaded = st.file_uploader("Compressor log file", type=["csv", "xlsx"])
+
+if uploaded is not None and st.button("Import"):
+
+    try:
+        with st.spinner("Importing..."), db.connection() as conn:
+            loaded, skipped, rejected = bulk_import.import_rows(
+                conn, bulk_import.read_rows(uploaded, uploaded.name)
+            )
+
+    except Exception as e:
+        st.error(f"Import failed, nothing was loaded: {e}")
+
+    else:
+        db.reports_changed()
+        st.success(f"✅ Loaded {loaded} rows.")
+        if skipped:
+            st.info(f"{skipped} rows were already imported and were skipped.")
+
+        if rejected:
+            st.warning(f"{len(rejected)} rows were rejected.")
+            st.dataframe(
+                [{"line": line, "error": error, **row} for line, row, error in rejected[:1000]]
+            )
+            rejects = io.StringIO()
+            bulk_import.write_rejects(rejects, rejected)
+            st.download_button("Download rejected rows", rejects.getvalue(), "rejected_rows.csv", "text/csv")
@@ -0,0 +1,78 @@
+import csv
+import io
+from datetime import date, timedelta
+
+import streamlit as st
+
+import db
+import queries
+import registry
+import repository
+
+PAGE_SIZE = 50
+
+st.title("Compressor History")
+
+
+@st.cache_data(ttl=60, max_entries=500)
+def load_page(compressor_code, start, end, after, version):
+    # version only changes when this process saves reports; saves by other
+    # processes (API, writer in another server) show up once the ttl expires
+    return repository.get_repository().history(compressor_code, start, end, after, PAGE_SIZE + 1)
+
+
+def export_csv(compressor_code, start, end):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(queries.HISTORY_COLUMNS)
+    with db.connection() as conn:
+        writer.writerows(queries.iter_history(conn, compressor_code, start, end))
+    return buffer.getvalue()
+
+
+compressor_code = registry.compressor_select()
+date_range = st.date_input("Date Range", value=(date.today() - timedelta(days=90), date.today()))
+
+if not compressor_code or len(date_range) != 2:
+    st.stop()
+
+start, end = date_range
+filters = (compressor_code, start, end)
+
+# Keyset cursors of the pages visited so far; reset when the filters change
+if st.session_state.get("history_filters") != filters:
+    st.session_state["history_filters"] = filters
+    st.session_state["history_cursors"] = [None]
+cursors = st.session_state["history_cursors"]
+
+try:
+    rows = load_page(compressor_code, start, end, cursors[-1], db.data_version())
+except Exception as e:
+    st.error(f"Database error: {e}")
+    st.stop()
+
+has_next = len(rows) > PAGE_SIZE
+rows = rows[:PAGE_SIZE]
+
+if not rows:
+    st.info("No reports for this compressor in the selected range.")
+else:
+    st.dataframe(rows, hide_index=True, column_order=queries.HISTORY_COLUMNS[1:])
+
+previous_col, page_col, next_col = st.columns([1, 2, 1])
+if previous_col.button("← Newer", disabled=len(cursors) == 1):
+    cursors.pop()
+    st.rerun()
+page_col.caption(f"Page {len(cursors)}")
+if next_col.button("Older →", disabled=not has_next):
+    last = rows[-1]
+    cursors.append((last["report_date"], last["report_id"]))
+    st.rerun()
+
+if st.button("Prepare CSV export"):
+    st.download_button(
+        "Download CSV",
+        export_csv(compressor_code, start, end),
+        f"compressor_{compressor_code}_{start}_{end}.csv",
+        "text/csv",
+    )
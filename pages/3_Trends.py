@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+import db
+import queries
+import registry
+
+LABELS = {
+    "oil_temperature": "Oil Temperature (°C)",
+    "motor_temperature": "Motor Temperature (°C)",
+    "pressure": "Pressure (MPa)",
+}
+
+st.title("Compressor Trends")
+
+
+@st.cache_data(ttl=600, max_entries=200)
+def load_trends(compressor_code, start, end, bucket, version):
+    with db.connection() as conn:
+        return pd.DataFrame(queries.trend_buckets(conn, compressor_code, start, end, bucket))
+
+
+def trend_chart(frame, metric):
+    base = alt.Chart(frame).encode(x=alt.X("bucket:T", title=None))
+    band = base.mark_area(opacity=0.25).encode(
+        y=alt.Y(f"{metric}_min:Q", title=LABELS[metric]), y2=f"{metric}_max:Q"
+    )
+    line = base.mark_line().encode(
+        y=f"{metric}_mean:Q",
+        tooltip=["bucket:T", f"{metric}_min:Q", f"{metric}_mean:Q", f"{metric}_max:Q"],
+    )
+    return (band + line).properties(height=220)
+
+
+compressor_code = registry.compressor_select()
+date_range = st.date_input("Date Range", value=(date.today() - timedelta(days=365), date.today()))
+
+if not compressor_code or len(date_range) != 2:
+    st.stop()
+
+start, end = date_range
+bucket = queries.choose_bucket(start, end)
+
+try:
+    frame = load_trends(compressor_code, start, end, bucket, db.data_version())
+except Exception as e:
+    st.error(f"Database error: {e}")
+    st.stop()
+
+if frame.empty:
+    st.info("No reports for this compressor in the selected range.")
+    st.stop()
+
+st.caption(f"{len(frame)} points, one per {bucket} — line is the mean, band spans min to max")
+for metric in queries.TREND_METRICS:
+    st.altair_chart(trend_chart(frame, metric))
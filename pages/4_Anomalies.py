@@ -0,0 +1,52 @@
+import threading
+
+import streamlit as st
+
+import analysis
+import db
+
+st.title("Compressor Anomalies")
+
+
+@st.cache_resource
+def get_detector():
+    # Shared by all sessions; each refresh only loads rows created since the watermark
+    return analysis.DriftDetector(), threading.Lock()
+
+
+def refresh():
+    detector, lock = get_detector()
+    with lock:
+        with db.connection() as conn:
+            detector.update(analysis.load_reports(conn, since=detector.watermark))
+    return detector
+
+
+try:
+    detector = refresh()
+except Exception as e:
+    st.error(f"Database error: {e}")
+    st.stop()
+
+flagged = detector.drifting()
+
+st.metric("Compressors flagged", len(flagged), help=f"out of {len(detector.latest)} with reports")
+
+if flagged.empty:
+    st.success("✅ No compressor is drifting or showing anomalous readings.")
+    st.stop()
+
+for metric in analysis.METRICS:
+    flagged = flagged.assign(**{metric: flagged[f"{metric}_drift"] | flagged[f"{metric}_anomaly"]})
+
+st.dataframe(
+    flagged.sort_values("report_date", ascending=False),
+    hide_index=True,
+    column_order=["compressor_code", "report_date", "drifting", "anomaly", *analysis.METRICS],
+    column_config={
+        "report_date": st.column_config.DateColumn("Last report"),
+        "drifting": st.column_config.CheckboxColumn("EWMA drift"),
+        "anomaly": st.column_config.CheckboxColumn("Outlier (z-score)"),
+        **{metric: st.column_config.CheckboxColumn(metric.replace("_", " ").capitalize()) for metric in analysis.METRICS},
+    },
+)
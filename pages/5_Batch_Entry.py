@@ -0,0 +1,136 @@
+import uuid
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+import alerts
+import db
+import registry
+import repository
+import spool
+from validation import (
+    CONDITION_FIELDS, CONDITION_OPTIONS, ON_LOAD_HOURS_RANGE, PRESSURE_RANGE, TEMPERATURE_RANGE, submission_id,
+    validate_record
+)
+
+COLUMNS = {
+    "compressor_code": st.column_config.SelectboxColumn(
+        "Compressor Code", options=list(registry.get_registry()) or None, required=True
+    ),
+    "operational_status": st.column_config.TextColumn("Operational Status"),
+    "oil_temperature": st.column_config.NumberColumn(
+        "Oil Temp (°C)", min_value=TEMPERATURE_RANGE[0], max_value=TEMPERATURE_RANGE[1], step=1
+    ),
+    "pressure": st.column_config.NumberColumn(
+        "Pressure (MPa)", min_value=PRESSURE_RANGE[0], max_value=PRESSURE_RANGE[1], format="%.2f"
+    ),
+    "on_load_total_time": st.column_config.NumberColumn(
+        "On Load (h)", min_value=ON_LOAD_HOURS_RANGE[0], max_value=ON_LOAD_HOURS_RANGE[1], format="%.2f"
+    ),
+    "motor_temperature": st.column_config.NumberColumn(
+        "Motor Temp (°C)", min_value=TEMPERATURE_RANGE[0], max_value=TEMPERATURE_RANGE[1], step=1
+    ),
+    "inverter_condition": st.column_config.SelectboxColumn("Inverter", options=CONDITION_OPTIONS),
+    "hmi_status": st.column_config.TextColumn("HMI Status"),
+    "compressor_fan": st.column_config.SelectboxColumn("Fan", options=CONDITION_OPTIONS),
+    "cleaning": st.column_config.SelectboxColumn("Cleaning", options=CONDITION_OPTIONS),
+    "air_tank_water_drain": st.column_config.SelectboxColumn("Water Drain", options=CONDITION_OPTIONS),
+}
+
+DEFAULT_ROW = {
+    "compressor_code": None,
+    "operational_status": "15kW Compressor Operational",
+    "oil_temperature": None,
+    "pressure": None,
+    "on_load_total_time": 4.0,
+    "motor_temperature": None,
+    "hmi_status": "Autoloadings on",
+    **{field: "ok" for field in CONDITION_FIELDS},
+}
+
+
+def blank_rows(count=20):
+    return pd.DataFrame([DEFAULT_ROW] * count, columns=list(COLUMNS))
+
+
+st.title("Batch Entry")
+st.write("Enter one row per compressor; all valid rows are saved together in a single transaction.")
+
+st.session_state.setdefault("submission_nonce", str(uuid.uuid4()))
+
+if "batch_rows" not in st.session_state:
+    st.session_state["batch_rows"] = blank_rows()
+    st.session_state["batch_editor"] = 0
+
+# Outcome of the last submission, shown after the table has been reset
+for kind, message in st.session_state.pop("batch_messages", []):
+    getattr(st, kind)(message)
+
+report_date = st.date_input("Report Date", value=date.today())
+
+with st.form("batch_form"):
+    edited = st.data_editor(
+        st.session_state["batch_rows"],
+        column_config=COLUMNS,
+        num_rows="dynamic",
+        hide_index=True,
+        key=f"batch_editor_{st.session_state['batch_editor']}",
+    )
+    submitted = st.form_submit_button("Submit Reports")
+
+if submitted:
+
+    records, rejected = [], []
+    for position, row in enumerate(edited.to_dict("records"), start=1):
+        if pd.isna(row["compressor_code"]) or not str(row["compressor_code"]).strip():
+            # Untouched template rows are not errors
+            continue
+        raw = {key: (None if pd.isna(value) else value) for key, value in row.items()}
+        try:
+            record = validate_record({**raw, "report_date": report_date})
+        except ValueError as e:
+            rejected.append((position, row, str(e)))
+            continue
+        record["report_id"] = submission_id(st.session_state["submission_nonce"], record)
+        records.append(record)
+
+    messages = []
+    if records:
+        try:
+            # One multi-row INSERT in one transaction
+            new_ids = repository.get_repository().insert_many(records)
+            db.reports_changed()
+            inserted = len(new_ids)
+            # Reports submitted before had their alerts queued then
+            saved = [record for record in records if record["report_id"] in new_ids]
+            messages.append(("success", f"✅ {inserted} compressor reports submitted successfully!"))
+            if inserted < len(records):
+                messages.append(("info", f"{len(records) - inserted} reports had already been submitted and were skipped."))
+
+        except spool.OUTAGE_ERRORS:
+            spool.get_spool().append(records)
+            saved = records
+            messages.append(("warning", f"💾 Database unreachable: {len(records)} reports saved offline and will be synced automatically."))
+
+        except Exception as e:
+            st.error(f"Database error, nothing was saved: {e}")
+            st.stop()
+
+        # After the reports are stored or spooled, so a broken rule cannot lose them
+        triggered, error = alerts.check_saved(saved)
+        messages.extend(("warning", f"⚠️ {alert['compressor_code']}: {alert['message']}") for alert in triggered)
+        if error is not None:
+            messages.append(("warning", f"The reports were saved, but alert rules could not be checked: {error}"))
+
+    if rejected:
+        messages.append(("error", f"{len(rejected)} rows need fixing and were kept in the table:"))
+        messages.extend(("caption", f"Row {position} ({row['compressor_code']}): {error}") for position, row, error in rejected)
+
+    # Keep only the rows that still need attention
+    st.session_state["batch_rows"] = (
+        pd.DataFrame([row for _, row, _ in rejected], columns=list(COLUMNS)) if rejected else blank_rows()
+    )
+    st.session_state["batch_editor"] += 1
+    st.session_state["batch_messages"] = messages
+    st.rerun()
@@ -0,0 +1,48 @@
+import streamlit as st
+
+import db
+import registry
+
+st.title("Compressors")
+
+UPSERT_QUERY = """
+INSERT INTO compressors (code, rating_kw, site, line, model)
+VALUES (%(code)s, %(rating_kw)s, %(site)s, %(line)s, %(model)s)
+ON CONFLICT (code) DO UPDATE
+SET rating_kw = EXCLUDED.rating_kw, site = EXCLUDED.site, line = EXCLUDED.line, model = EXCLUDED.model
+"""
+
+compressors = registry.get_registry()
+st.dataframe(list(compressors.values()), hide_index=True)
+
+with st.form("compressor_registry_form", clear_on_submit=True):
+    st.subheader("Register or update a compressor")
+    code = st.text_input("Code")
+    rating_kw = st.number_input("Rating (kW)", min_value=0.0, value=15.0, step=0.5)
+    site = st.text_input("Site")
+    line = st.text_input("Line")
+    model = st.text_input("Model", help="Selects the alert thresholds in alert_rules.toml")
+    submitted = st.form_submit_button("Save")
+
+if submitted:
+
+    if not code.strip():
+        st.error("Code is required.")
+        st.stop()
+
+    try:
+        with db.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(UPSERT_QUERY, {
+                    "code": code.strip(),
+                    "rating_kw": rating_kw,
+                    "site": site.strip() or None,
+                    "line": line.strip() or None,
+                    "model": model.strip() or None,
+                })
+        # Make the new entry show up in every dropdown straight away
+        registry.load_registry.clear()
+        st.success(f"✅ Compressor {code.strip()} saved.")
+
+    except Exception as e:
+        st.error(f"Database error: {e}")
@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+import db
+import kpis
+import registry
+
+st.title("Compressor KPIs")
+
+
+@st.cache_data(ttl=60)
+def refresh_rollups(version):
+    # Recomputes only the days queued since the last refresh; a no-op when nothing changed
+    with db.connection() as conn:
+        return kpis.refresh(conn)
+
+
+@st.cache_data(ttl=600, max_entries=50)
+def load_kpis(bucket, start, end, compressor_code, version):
+    with db.connection() as conn:
+        return pd.DataFrame(kpis.summary(conn, bucket, start, end, compressor_code))
+
+
+bucket = st.radio("Per", kpis.BUCKETS, index=1, horizontal=True, format_func=str.capitalize)
+date_range = st.date_input("Date Range", value=(date.today() - timedelta(days=365), date.today()))
+all_compressors = st.checkbox("All compressors", value=True)
+compressor_code = None if all_compressors else registry.compressor_select()
+
+if len(date_range) != 2:
+    st.stop()
+
+start, end = date_range
+
+try:
+    refresh_rollups(db.data_version())
+    frame = load_kpis(bucket, start, end, compressor_code, db.data_version())
+except Exception as e:
+    st.error(f"Database error: {e}")
+    st.stop()
+
+if frame.empty:
+    st.info("No reports in the selected range.")
+    st.stop()
+
+st.dataframe(
+    frame,
+    hide_index=True,
+    column_config={
+        "period": st.column_config.DateColumn(bucket.capitalize()),
+        "compressor_code": "Compressor",
+        "reports": "Reports",
+        "oil_temperature_mean": st.column_config.NumberColumn("Oil °C (mean)", format="%.1f"),
+        "oil_temperature_max": "Oil °C (max)",
+        "motor_temperature_mean": st.column_config.NumberColumn("Motor °C (mean)", format="%.1f"),
+        "motor_temperature_max": "Motor °C (max)",
+        "pressure_mean": st.column_config.NumberColumn("Pressure MPa (mean)", format="%.2f"),
+        "pressure_min": st.column_config.NumberColumn("Pressure MPa (min)", format="%.2f"),
+        "on_load_hours_mean": st.column_config.NumberColumn("On-load h (mean)", format="%.1f"),
+        **{
+            f"{field}_not_ok": f"{field.replace('_', ' ').capitalize()} not ok"
+            for field in kpis.CONDITIONS
+        },
+    },
+)
+st.download_button(
+    "Download CSV", frame.to_csv(index=False), file_name=f"compressor_kpis_{bucket}_{start}_{end}.csv",
+    mime="text/csv",
+)
@@ -0,0 +1,75 @@
+import pandas as pd
+import streamlit as st
+
+import db
+import queries
+
+st.title("Fleet Overview")
+
+# A compressor is overdue once its last report is older than this many days
+missed_report_days = int(st.secrets.get("app", {}).get("missed_report_days", 1))
+
+# Worst first
+STATUSES = ("🔴 Not ok", "🟠 Report missing", "🟢 Ok")
+
+
+@st.cache_data(ttl=60)
+def load_fleet(version):
+    # Shared by every session in this process, so any number of wallboards cost one query a minute;
+    # a submission bumps db.data_version() and the next refresh reads the new report
+    with db.connection() as conn:
+        return pd.DataFrame(queries.fleet_status(conn))
+
+
+def status(row):
+    if row["not_ok"]:
+        return STATUSES[0]
+    if pd.isna(row["days_since_report"]) or row["days_since_report"] > missed_report_days:
+        return STATUSES[1]
+    return STATUSES[2]
+
+
+@st.fragment(run_every=60)
+def overview():
+    try:
+        fleet = load_fleet(db.data_version())
+    except Exception as e:
+        st.error(f"Database error: {e}")
+        return
+    if fleet.empty:
+        st.info("No compressors registered.")
+        return
+
+    fleet = fleet.assign(
+        status=pd.Categorical(fleet.apply(status, axis=1), categories=STATUSES, ordered=True),
+        not_ok=fleet["not_ok"].map(lambda fields: ", ".join(f.replace("_", " ") for f in fields)),
+    )
+    counts = fleet["status"].value_counts()
+    for column, label in zip(st.columns(len(STATUSES)), STATUSES):
+        column.metric(label, int(counts[label]))
+
+    st.dataframe(
+        fleet.sort_values(["status", "compressor_code"]),
+        hide_index=True,
+        column_order=[
+            "status", "compressor_code", "site", "line", "report_date", "days_since_report",
+            "oil_temperature", "motor_temperature", "pressure", "not_ok", "operational_status",
+        ],
+        column_config={
+            "status": "Status",
+            "compressor_code": "Compressor",
+            "site": "Site",
+            "line": "Line",
+            "report_date": st.column_config.DateColumn("Last report"),
+            "days_since_report": st.column_config.NumberColumn("Days since", format="%d"),
+            "oil_temperature": "Oil °C",
+            "motor_temperature": "Motor °C",
+            "pressure": st.column_config.NumberColumn("Pressure MPa", format="%.2f"),
+            "not_ok": "Not ok",
+            "operational_status": "Operational status",
+        },
+    )
+    st.caption(f"Refreshes every minute; last updated {pd.Timestamp.now():%H:%M:%S}")
+
+
+overview()
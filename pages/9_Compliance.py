@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+import db
+import queries
+import registry
+
+st.title("Report Compliance")
+
+# Rows in the heatmap; the compressors with the most missing days come first
+HEATMAP_COMPRESSORS = 50
+
+
+@st.cache_data(ttl=600, max_entries=20)
+def load_missing(start, end, version):
+    with db.connection() as conn:
+        return pd.DataFrame(queries.missing_reports(conn, start, end), columns=["compressor_code", "report_date"])
+
+
+@st.cache_data(ttl=600, max_entries=20)
+def heatmap_frame(start, end, bucket, compressors, version):
+    # Missing days per compressor and day or week, for the worst compressors only
+    missing = load_missing(start, end, version)
+    missing = missing[missing["compressor_code"].isin(compressors)]
+    worst = missing["compressor_code"].value_counts().index[:HEATMAP_COMPRESSORS]
+    missing = missing[missing["compressor_code"].isin(worst)]
+    periods = pd.to_datetime(missing["report_date"])
+    if bucket == "week":
+        periods = periods.dt.to_period("W").dt.start_time
+    return (
+        missing.assign(period=periods)
+        .groupby(["compressor_code", "period"], as_index=False)
+        .size()
+        .rename(columns={"size": "missing"})
+    )
+
+
+def heatmap(frame, bucket, order):
+    return alt.Chart(frame).mark_rect().encode(
+        x=alt.X("period:T", title=None, timeUnit="yearmonthdate"),
+        y=alt.Y("compressor_code:N", title=None, sort=order),
+        color=alt.Color("missing:Q", title="Missing days", scale=alt.Scale(scheme="orangered")),
+        tooltip=["compressor_code:N", alt.Tooltip("period:T", title=bucket.capitalize()), "missing:Q"],
+    ).properties(height=alt.Step(14))
+
+
+compressors = registry.get_registry()
+sites = sorted({c["site"] for c in compressors.values() if c["site"]})
+date_range = st.date_input("Date Range", value=(date.today() - timedelta(days=90), date.today()))
+site = st.selectbox("Site", ["All sites", *sites])
+
+if len(date_range) != 2:
+    st.stop()
+
+start, end = date_range
+selected = sorted(code for code, c in compressors.items() if site == "All sites" or c["site"] == site)
+
+try:
+    missing = load_missing(start, end, db.data_version())
+except Exception as e:
+    st.error(f"Database error: {e}")
+    st.stop()
+
+missing = missing[missing["compressor_code"].isin(selected)]
+expected = len(selected) * ((end - start).days + 1)
+
+columns = st.columns(3)
+columns[0].metric("Compliance", f"{1 - len(missing) / expected:.1%}" if expected else "–")
+columns[1].metric("Missing reports", len(missing), help=f"out of {expected} compressor days")
+columns[2].metric("Compressors with gaps", missing["compressor_code"].nunique(), help=f"out of {len(selected)}")
+
+if missing.empty:
+    st.success("✅ Every compressor was reported every day.")
+    st.stop()
+
+bucket = "day" if (end - start).days < 92 else "week"
+frame = heatmap_frame(start, end, bucket, tuple(selected), db.data_version())
+order = list(frame.groupby("compressor_code")["missing"].sum().sort_values(ascending=False).index)
+st.subheader(f"Missing reports per {bucket}")
+if missing["compressor_code"].nunique() > HEATMAP_COMPRESSORS:
+    st.caption(f"The {HEATMAP_COMPRESSORS} compressors with the most missing days")
+st.altair_chart(heatmap(frame, bucket, order))
+
+st.subheader("Not reported on")
+# Yesterday by default, the last complete day, kept inside the range
+default_day = max(start, min(end, date.today() - timedelta(days=1)))
+day = st.date_input("Day", value=default_day, min_value=start, max_value=end)
+st.dataframe(
+    [compressors[code] for code in missing.loc[missing["report_date"] == day, "compressor_code"]],
+    hide_index=True,
+)
+st.download_button(
+    "Download all missing reports (CSV)", missing.to_csv(index=False),
+    file_name=f"missing_reports_{start}_{end}.csv", mime="text/csv",
+)
@@ -0,0 +1,97 @@
+"""Rerun profiler: how long each rerun of a page takes, section by section.
+
+Enable it for every session with
+
+    [app]
+    profile = true
+
+or for one browser session by opening the page with ``?profile=1``. Each rerun
+is appended to ``profile_log`` (default profiler.log; "" logs to stderr) and
+the last reruns of the session are shown in the sidebar.
+"""
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Reruns kept per session for the sidebar panel
+HISTORY_SIZE = 20
+
+
+def enabled():
+    return bool(st.secrets.get("app", {}).get("profile", False)) or st.query_params.get("profile") == "1"
+
+
+@st.cache_resource
+def log_handler():
+    # Once per server process: Streamlit configures no handler for this logger, so INFO would be dropped
+    path = st.secrets.get("app", {}).get("profile_log", "profiler.log")
+    handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return handler
+
+
+class RerunProfiler:
+    """Times one script run; ``section()`` blocks are attributed by name, the rest is "other"."""
+
+    def __init__(self, page, enabled=True):
+        self.page = page
+        self.enabled = enabled
+        self.sections = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = self.sections.get(name, 0.0) + time.perf_counter() - started
+
+    def finish(self):
+        """Record the rerun in the session, log it and draw the sidebar panel."""
+        if not self.enabled:
+            return
+        wall = time.perf_counter() - self._started
+        count = st.session_state.get("profiler_reruns", 0) + 1
+        st.session_state["profiler_reruns"] = count
+        rerun = {
+            "rerun": count,
+            "wall_ms": wall * 1000,
+            **{f"{name}_ms": seconds * 1000 for name, seconds in self.sections.items()},
+            "other_ms": max(wall - sum(self.sections.values()), 0.0) * 1000,
+        }
+        history = st.session_state.setdefault("profiler_history", [])
+        history.append(rerun)
+        del history[:-HISTORY_SIZE]
+
+        session = st.session_state.setdefault("profiler_session", uuid.uuid4().hex[:8])
+        logger.info(
+            "%s session %s rerun %d: %.1f ms (%s)", self.page, session, count, rerun["wall_ms"],
+            ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.sections.items()),
+        )
+        with st.sidebar:
+            st.subheader("Rerun profile")
+            st.metric("Last rerun", f"{rerun['wall_ms']:.0f} ms", f"rerun {count} of this session", delta_color="off")
+            st.dataframe(
+                [{key: round(value, 1) if key != "rerun" else value for key, value in row.items()}
+                 for row in reversed(history)],
+                hide_index=True,
+            )
+
+
+def start(page):
+    """Profiler for this run of ``page``; a no-op unless profiling is enabled."""
+    if not enabled():
+        return RerunProfiler(page, enabled=False)
+    log_handler()
+    return RerunProfiler(page)
@@ -0,0 +1,155 @@
+import psycopg2.extras
+
+HISTORY_COLUMNS = (
+    "report_id", "report_date", "compressor_code", "operational_status", "oil_temperature",
+    "pressure", "on_load_total_time", "motor_temperature", "inverter_condition", "hmi_status",
+    "compressor_fan", "cleaning", "air_tank_water_drain",
+)
+
+_HISTORY_SELECT = """
+SELECT {}
+FROM air_compressor_reports
+WHERE compressor_code = %(compressor_code)s
+  AND report_date BETWEEN %(start)s AND %(end)s
+""".format(", ".join(HISTORY_COLUMNS))
+
+
+def history_query(compressor_code, start, end, after=None, limit=50):
+    # Shared by both drivers: psycopg2 and psycopg 3 take the same %(name)s parameters.
+    # Not a prepared statement: the planner prunes partitions per call, so a cached plan saves nothing.
+    query = _HISTORY_SELECT
+    params = {"compressor_code": compressor_code, "start": start, "end": end, "limit": limit}
+    if after is not None:
+        query += "  AND (report_date, report_id) < (%(after_date)s, %(after_id)s)\n"
+        params["after_date"], params["after_id"] = after
+    query += "ORDER BY report_date DESC, report_id DESC\nLIMIT %(limit)s"
+    return query, params
+
+
+def history_page(conn, compressor_code, start, end, after=None, limit=50):
+    """Newest-first page of reports; ``after`` is the (report_date, report_id) of the last row seen.
+
+    Keyset pagination: every page is an index range scan, however deep.
+    """
+    query, params = history_query(compressor_code, start, end, after, limit)
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+
+def iter_history(conn, compressor_code, start, end, itersize=5000):
+    # Server-side (named) cursor: rows are fetched itersize at a time, not all at once
+    with conn.cursor(name="history_export") as cur:
+        cur.itersize = itersize
+        cur.execute(
+            _HISTORY_SELECT + "ORDER BY report_date DESC, report_id DESC",
+            {"compressor_code": compressor_code, "start": start, "end": end},
+        )
+        yield from cur
+
+
+TREND_METRICS = ("oil_temperature", "motor_temperature", "pressure")
+
+BUCKETS = {"day": 1, "week": 7, "month": 31}
+
+
+def choose_bucket(start, end, max_points=1000):
+    # Smallest bucket that keeps each series under max_points
+    days = (end - start).days + 1
+    for bucket, width in BUCKETS.items():
+        if days / width <= max_points:
+            return bucket
+    return "month"
+
+
+def trend_buckets(conn, compressor_code, start, end, bucket):
+    """Per-bucket min/mean/max of each trend metric, aggregated in the database."""
+    if bucket not in BUCKETS:
+        raise ValueError(f"unknown bucket {bucket!r}")
+    aggregates = ",\n       ".join(
+        f"min({m})::float AS {m}_min, avg({m})::float AS {m}_mean, max({m})::float AS {m}_max"
+        for m in TREND_METRICS
+    )
+    query = f"""
+    SELECT date_trunc('{bucket}', report_date)::date AS bucket,
+           {aggregates}
+    FROM air_compressor_reports
+    WHERE compressor_code = %(compressor_code)s
+      AND report_date BETWEEN %(start)s AND %(end)s
+    GROUP BY 1
+    ORDER BY 1
+    """
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(query, {"compressor_code": compressor_code, "start": start, "end": end})
+        return cur.fetchall()
+
+
+CONDITION_COLUMNS = ("inverter_condition", "compressor_fan", "cleaning", "air_tank_water_drain")
+
+_LATEST_REPORT = """
+        SELECT report_date, operational_status, oil_temperature, motor_temperature, pressure, {}
+        FROM air_compressor_reports
+        WHERE compressor_code = c.code{{}}
+        ORDER BY report_date DESC, created_at DESC
+        LIMIT 1""".format(", ".join(CONDITION_COLUMNS))
+
+# Every registered compressor with its latest report, in one statement: a LIMIT 1 per compressor on
+# the (compressor_code, report_date DESC) index. The first branch only scans the last partitions;
+# the second, unbounded one only runs for compressors without a recent report.
+FLEET_QUERY = """
+SELECT c.code AS compressor_code, c.site, c.line, c.model, r.*,
+       current_date - r.report_date AS days_since_report,
+       array_remove(ARRAY[{not_ok}], NULL) AS not_ok
+FROM compressors c
+LEFT JOIN LATERAL (
+    ({recent}
+    )
+    UNION ALL
+    ({older}
+    )
+    LIMIT 1
+) r ON true
+ORDER BY c.code
+""".format(
+    not_ok=", ".join(f"CASE WHEN r.{c} = 'not ok' THEN '{c}' END" for c in CONDITION_COLUMNS),
+    recent=_LATEST_REPORT.format(" AND report_date > current_date - %(recent_days)s"),
+    older=_LATEST_REPORT.format(""),
+)
+
+
+def fleet_status(conn, recent_days=31):
+    """Latest report of every registered compressor; report columns are None if it was never reported."""
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(FLEET_QUERY, {"recent_days": recent_days})
+        return cur.fetchall()
+
+
+# Every (registered compressor, day) in the range without a report. One set difference between the
+# calendar and the reported pairs, hashed in a single pass however many compressors there are.
+MISSING_QUERY = """
+SELECT compressor_code, report_date
+FROM (
+    SELECT c.code, d.day::date
+    FROM compressors c
+    CROSS JOIN generate_series(%(start)s::date, %(end)s::date, interval '1 day') AS d (day)
+    EXCEPT
+    SELECT compressor_code, report_date
+    FROM air_compressor_reports
+    WHERE report_date BETWEEN %(start)s AND %(end)s
+) AS missing (compressor_code, report_date)
+ORDER BY report_date, compressor_code
+"""
+
+
+# Enough to hash a year of calendar for a few thousand compressors; below it, the planner sorts both
+# sides on disk instead, about twice as slow
+MISSING_WORK_MEM = "64MB"
+
+
+def missing_reports(conn, start, end):
+    """(compressor_code, report_date) pairs from start to end on which a registered compressor was not reported."""
+    with conn.cursor() as cur:
+        # For this transaction only
+        cur.execute("SET LOCAL work_mem = %s", (MISSING_WORK_MEM,))
+        cur.execute(MISSING_QUERY, {"start": start, "end": end})
+        return cur.fetchall()
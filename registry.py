@@ -0,0 +1,58 @@
+import psycopg2.extras
+import streamlit as st
+
+import db
+
+REGISTRY_QUERY = "SELECT code, rating_kw, site, line, model FROM compressors ORDER BY code"
+
+# Last registry this process loaded, for callers that must not wait on the database
+_snapshot = None
+
+
+@st.cache_data(ttl=600)
+def load_registry():
+    # Shared by every session; reruns never hit the database until the TTL expires
+    with db.connection() as conn:
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute(REGISTRY_QUERY)
+            return {row["code"]: row for row in cur.fetchall()}
+
+
+def get_registry():
+    global _snapshot
+    try:
+        _snapshot = load_registry()
+    except Exception:
+        return {}
+    return _snapshot
+
+
+def model_of(compressor_code):
+    """Model from the last loaded registry; None if it has not been loaded or lacks the code.
+
+    Never queries, so it works during an outage and after the TTL has expired.
+    """
+    compressor = (_snapshot or {}).get(compressor_code)
+    return compressor["model"] if compressor else None
+
+
+def describe(compressor):
+    details = [part for part in (compressor["site"], compressor["line"]) if part]
+    if compressor["rating_kw"] is not None:
+        details.append(f"{float(compressor['rating_kw']):g} kW")
+    return f"{compressor['code']} — {' / '.join(details)}" if details else compressor["code"]
+
+
+def compressor_select(label="Compressor Code", default="1008", key=None):
+    """Searchable compressor picker; falls back to free text if the registry is unavailable."""
+    registry = get_registry()
+    if not registry:
+        return st.text_input(label, default, key=key).strip()
+    codes = list(registry)
+    return st.selectbox(
+        label,
+        codes,
+        index=codes.index(default) if default in registry else 0,
+        format_func=lambda code: describe(registry[code]),
+        key=key,
+    )
@@ -1,91 +1,203 @@
-import streamlit as st
-import psycopg2
-from datetime import date
-
-st.title("Air Compressor Daily Report")
-
-# Form for technicians
-with st.form("compressor_form"):
-
-    report_date = st.date_input("Report Date", value=date.today())
-    compressor_code = st.text_input("Compressor Code", "1008")
-
-    operational_status = st.text_input(
-        "Operational Status", "15kW Compressor Operational"
-    )
-
-    oil_temperature = st.number_input("Oil Temperature (°C)", min_value=0, max_value=200)
-
-    pressure = st.number_input("Pressure (MPa)", min_value=0.0, max_value=2.0, format="%.2f")
-
-    on_load_total_time = st.text_input("On Load Total Time (hours)", "04")
-
-    motor_temperature = st.number_input("Motor Temperature (°C)", min_value=0, max_value=200)
-
-    inverter_condition = st.selectbox("Inverter Condition", ["ok", "not ok"])
-
-    hmi_status = st.text_input("HMI Status", "Autoloadings on")
-
-    compressor_fan = st.selectbox("Compressor Fan", ["ok", "not ok"])
-
-    cleaning = st.selectbox("Cleaning Status", ["ok", "not ok"])
-
-    air_tank_water_drain = st.selectbox("Air Tank Water Drain", ["ok", "not ok"])
-
-    submitted = st.form_submit_button("Submit Report")
-
-# When form is submitted
-if submitted:
-
-    try:
-        def get_connection():
-            conn = psycopg2.connect(
-                host=st.secrets["database"]["host"],
-                port=st.secrets["database"]["port"],
-                dbname=st.secrets["database"]["dbname"],
-                user=st.secrets["database"]["user"],
-                password=st.secrets["database"]["password"]
-            )
-            return conn
-
-        conn = get_connection()
-        cur = conn.cursor()
-
-        record = {
-            "report_date": report_date,
-            "compressor_code": compressor_code,
-            "operational_status": operational_status,
-            "oil_temperature": oil_temperature,
-            "pressure": pressure,
-            "on_load_total_time": on_load_total_time,
-            "motor_temperature": motor_temperature,
-            "inverter_condition": inverter_condition,
-            "hmi_status": hmi_status,
-            "compressor_fan": compressor_fan,
-            "cleaning": cleaning,
-            "air_tank_water_drain": air_tank_water_drain
-        }
-
-        insert_query = """
-        INSERT INTO air_compressor_reports
-        (report_date, compressor_code, operational_status, oil_temperature, pressure,
-        on_load_total_time, motor_temperature, inverter_condition, hmi_status,
-        compressor_fan, cleaning, air_tank_water_drain)
-        VALUES (%(report_date)s, %(compressor_code)s, %(operational_status)s, %(oil_temperature)s, %(pressure)s,
-                %(on_load_total_time)s, %(motor_temperature)s, %(inverter_condition)s, %(hmi_status)s,
-                %(compressor_fan)s, %(cleaning)s, %(air_tank_water_drain)s)
-        """
-
-        cur.execute(insert_query, record)
-        conn.commit()
-
-        st.success("✅ Compressor report submitted successfully!")
-
-    except Exception as e:
-        st.error(f"Database error: {e}")
-
-    finally:
-        if 'cur' in locals():
-            cur.close()
-        if 'conn' in locals():
-            conn.close()
+import streamlit as st
+import uuid
+from datetime import date
+
+import alerts
+import db
+import latest
+import metrics
+import profiler
+import registry
+import repository
+import spool
+import writer
+from validation import (
+    CONDITION_FIELDS, CONDITION_OPTIONS, ON_LOAD_HOURS_RANGE, PRESSURE_RANGE, TEMPERATURE_RANGE, submission_id
+)
+
+# Per-section timings of this rerun, shown in the sidebar when profiling is enabled
+profile = profiler.start("report")
+
+write_behind = st.secrets.get("app", {}).get("write_behind", False)
+
+with profile.section("startup"):
+    # Starts the worker that replays reports saved while the database was down
+    spool.get_spool()
+
+    # Prometheus endpoint for the submit path, see [metrics] in secrets.toml
+    metrics.serve(db.get_pool())
+
+
+@st.fragment(run_every=2)
+def submission_status():
+    # Durability indicator for this session's most recent queued reports
+    submissions = st.session_state.get("submissions", [])
+    for submission in submissions:
+        if submission["state"] == writer.QUEUED:
+            submission["state"], submission["error"] = writer.get_writer().status(submission["ticket"])
+
+        code = submission["compressor_code"]
+        if submission["state"] == writer.QUEUED:
+            st.caption(f"🕓 Report for compressor {code} queued")
+        elif submission["state"] == writer.WRITTEN:
+            st.caption(f"✅ Report for compressor {code} saved")
+        elif submission["state"] == writer.SPOOLED:
+            st.caption(f"💾 Report for compressor {code} saved offline, will sync when the database is back")
+        elif submission["state"] == writer.UNKNOWN:
+            st.caption(f"❔ Report for compressor {code} is no longer tracked, check the History page")
+        else:
+            st.error(f"Report for compressor {code} could not be saved: {submission['error']}")
+
+
+def form_defaults(compressor_code):
+    # Start from the compressor's last report so technicians only change what moved
+    defaults = {
+        "operational_status": "15kW Compressor Operational",
+        "oil_temperature": 0,
+        "pressure": 0.0,
+        "on_load_total_time": 4.0,
+        "motor_temperature": 0,
+        "hmi_status": "Autoloadings on",
+        **{field: "ok" for field in CONDITION_FIELDS},
+    }
+    try:
+        last = latest.get_latest().get(compressor_code)
+    except Exception:
+        last = None
+    if last:
+        defaults.update({field: last[field] for field in defaults if last[field] is not None})
+    for field in ("oil_temperature", "motor_temperature"):
+        defaults[field] = int(defaults[field])
+    for field in ("pressure", "on_load_total_time"):
+        defaults[field] = float(defaults[field])
+    return defaults
+
+
+st.title("Air Compressor Daily Report")
+
+# Seeds the report ids of this session's submissions, see validation.submission_id
+st.session_state.setdefault("submission_nonce", str(uuid.uuid4()))
+
+# Outside the form so that choosing a compressor refreshes the defaults below
+with profile.section("registry"):
+    compressor_code = registry.compressor_select()
+with profile.section("defaults"):
+    defaults = form_defaults(compressor_code)
+
+# Form for technicians
+with profile.section("form"), st.form("compressor_form"):
+
+    report_date = st.date_input("Report Date", value=date.today())
+
+    operational_status = st.text_input(
+        "Operational Status", defaults["operational_status"]
+    )
+
+    oil_temperature = st.number_input(
+        "Oil Temperature (°C)", min_value=TEMPERATURE_RANGE[0], max_value=TEMPERATURE_RANGE[1],
+        value=defaults["oil_temperature"]
+    )
+
+    pressure = st.number_input(
+        "Pressure (MPa)", min_value=PRESSURE_RANGE[0], max_value=PRESSURE_RANGE[1],
+        value=defaults["pressure"], format="%.2f"
+    )
+
+    on_load_total_time = st.number_input(
+        "On Load Total Time (hours)", min_value=ON_LOAD_HOURS_RANGE[0], max_value=ON_LOAD_HOURS_RANGE[1],
+        value=defaults["on_load_total_time"], step=0.25, format="%.2f"
+    )
+
+    motor_temperature = st.number_input(
+        "Motor Temperature (°C)", min_value=TEMPERATURE_RANGE[0], max_value=TEMPERATURE_RANGE[1],
+        value=defaults["motor_temperature"]
+    )
+
+    inverter_condition = st.selectbox(
+        "Inverter Condition", CONDITION_OPTIONS, CONDITION_OPTIONS.index(defaults["inverter_condition"])
+    )
+
+    hmi_status = st.text_input("HMI Status", defaults["hmi_status"])
+
+    compressor_fan = st.selectbox(
+        "Compressor Fan", CONDITION_OPTIONS, CONDITION_OPTIONS.index(defaults["compressor_fan"])
+    )
+
+    cleaning = st.selectbox(
+        "Cleaning Status", CONDITION_OPTIONS, CONDITION_OPTIONS.index(defaults["cleaning"])
+    )
+
+    air_tank_water_drain = st.selectbox(
+        "Air Tank Water Drain", CONDITION_OPTIONS, CONDITION_OPTIONS.index(defaults["air_tank_water_drain"])
+    )
+
+    submitted = st.form_submit_button("Submit Report")
+
+# When form is submitted
+if submitted:
+
+    record = {
+        "report_date": report_date,
+        "compressor_code": compressor_code,
+        "operational_status": operational_status,
+        "oil_temperature": oil_temperature,
+        "pressure": pressure,
+        "on_load_total_time": on_load_total_time,
+        "motor_temperature": motor_temperature,
+        "inverter_condition": inverter_condition,
+        "hmi_status": hmi_status,
+        "compressor_fan": compressor_fan,
+        "cleaning": cleaning,
+        "air_tank_water_drain": air_tank_water_drain
+    }
+
+    record["report_id"] = submission_id(st.session_state["submission_nonce"], record)
+    saved = False
+
+    if write_behind:
+        # Returns immediately; the background writer batches the INSERT
+        submissions = st.session_state.setdefault("submissions", [])
+        submissions.append({
+            "ticket": writer.get_writer().submit(record),
+            "compressor_code": compressor_code,
+            "state": writer.QUEUED,
+            "error": None,
+        })
+        del submissions[:-5]
+        st.info("🕓 Compressor report queued.")
+        saved = True
+
+    else:
+        try:
+            with profile.section("insert"):
+                inserted = repository.get_repository().insert(record)
+                db.reports_changed()
+
+            if inserted:
+                st.success("✅ Compressor report submitted successfully!")
+                saved = True
+            else:
+                # Its alerts were queued when it was first submitted
+                st.info("This report was already submitted.")
+
+        except spool.OUTAGE_ERRORS:
+            # Keep the report locally; the replay worker sends it once the database is back
+            spool.get_spool().append([record])
+            st.warning("💾 Database unreachable: report saved offline and will be synced automatically.")
+            saved = True
+
+        except Exception as e:
+            st.error(f"Database error: {e}")
+
+    if saved:
+        # Threshold alerts are queued locally; the notifier sends them in the background
+        triggered, error = alerts.check_saved([record])
+        for alert in triggered:
+            st.warning(f"⚠️ {alert['message']}")
+        if error is not None:
+            st.warning(f"The report was saved, but alert rules could not be checked: {error}")
+
+if write_behind:
+    submission_status()
+
+profile.finish()
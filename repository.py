@@ -0,0 +1,175 @@
+"""Report storage behind one interface, so the write path can run without PostgreSQL.
+
+The Streamlit app uses ``get_repository()`` (PostgreSQL through the shared
+pool); ``loadtest.py --sqlite`` and ``api.py --sqlite`` use
+``SQLiteRepository(":memory:")`` or a file instead.
+"""
+import sqlite3
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+import psycopg2
+import psycopg2.extras
+import streamlit as st
+
+import db
+import metrics
+import queries
+
+# A record the database refuses, as opposed to a database that is unreachable
+STORAGE_ERRORS = (psycopg2.Error, sqlite3.Error)
+
+LATEST_QUERY = f"""
+SELECT {", ".join(queries.HISTORY_COLUMNS)}
+FROM air_compressor_reports
+WHERE compressor_code = %s
+ORDER BY report_date DESC, created_at DESC
+LIMIT 1
+"""
+
+
+class ReportRepository:
+    """Insert reports and read them back; subclasses implement one database each."""
+
+    def insert(self, record):
+        """Insert one report; False if its report_id was already stored."""
+        return record["report_id"] in self.insert_many([record])
+
+    def insert_many(self, records):
+        """Insert reports in one transaction; returns the set of report_ids that were new."""
+        raise NotImplementedError
+
+    def history(self, compressor_code, start, end, after=None, limit=50):
+        """Newest-first page of reports; ``after`` is the (report_date, report_id) of the last row seen."""
+        raise NotImplementedError
+
+    def latest(self, compressor_code):
+        """The compressor's most recent report, or None."""
+        raise NotImplementedError
+
+    def known_codes(self):
+        """Registered compressor codes, or None when any code is accepted."""
+        raise NotImplementedError
+
+
+class PostgresRepository(ReportRepository):
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def insert_many(self, records):
+        with metrics.submit():
+            # Timed here rather than in the pool, so reads do not count as submit time
+            checkout = time.perf_counter()
+            with self._pool.connection() as conn:
+                metrics.POOL_WAIT_SECONDS.observe(time.perf_counter() - checkout)
+                inserted = db.insert_reports(conn, records)
+                with metrics.timed(metrics.COMMIT_SECONDS):
+                    conn.commit()
+        metrics.REPORTS.inc(len(inserted))
+        return inserted
+
+    def history(self, compressor_code, start, end, after=None, limit=50):
+        with self._pool.connection() as conn:
+            return queries.history_page(conn, compressor_code, start, end, after, limit)
+
+    def latest(self, compressor_code):
+        with self._pool.connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                cur.execute(LATEST_QUERY, (compressor_code,))
+                return cur.fetchone()
+
+    def known_codes(self):
+        with self._pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT code FROM compressors")
+                return {code for (code,) in cur.fetchall()}
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS air_compressor_reports (
+    report_id TEXT PRIMARY KEY,
+    report_date TEXT NOT NULL,
+    compressor_code TEXT NOT NULL,
+    operational_status TEXT,
+    oil_temperature INTEGER,
+    pressure REAL,
+    on_load_total_time REAL,
+    motor_temperature INTEGER,
+    inverter_condition TEXT,
+    hmi_status TEXT,
+    compressor_fan TEXT,
+    cleaning TEXT,
+    air_tank_water_drain TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE INDEX IF NOT EXISTS air_compressor_reports_history_idx
+    ON air_compressor_reports (compressor_code, report_date DESC, report_id DESC);
+"""
+
+
+def _sqlite_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class SQLiteRepository(ReportRepository):
+    """Embedded stand-in with the same table and index; accepts any compressor code."""
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        # SQLite serialises writers anyway; one shared connection keeps ":memory:" usable
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SQLITE_SCHEMA)
+
+    def insert_many(self, records):
+        query = "INSERT OR IGNORE INTO air_compressor_reports ({}) VALUES ({})".format(
+            ", ".join(db.REPORT_COLUMNS), ", ".join("?" * len(db.REPORT_COLUMNS))
+        )
+        inserted = set()
+        with self._lock, self._conn:
+            for record in records:
+                cur = self._conn.execute(query, [_sqlite_value(record[column]) for column in db.REPORT_COLUMNS])
+                if cur.rowcount:
+                    inserted.add(record["report_id"])
+        return inserted
+
+    def _rows(self, query, params):
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{**row, "report_date": date.fromisoformat(row["report_date"])} for row in map(dict, rows)]
+
+    def history(self, compressor_code, start, end, after=None, limit=50):
+        query = f"""SELECT {", ".join(queries.HISTORY_COLUMNS)} FROM air_compressor_reports
+        WHERE compressor_code = ? AND report_date BETWEEN ? AND ?"""
+        params = [compressor_code, start.isoformat(), end.isoformat()]
+        if after is not None:
+            query += " AND (report_date, report_id) < (?, ?)"
+            params += [after[0].isoformat(), str(after[1])]
+        query += " ORDER BY report_date DESC, report_id DESC LIMIT ?"
+        return self._rows(query, params + [limit])
+
+    def latest(self, compressor_code):
+        rows = self._rows(LATEST_QUERY.replace("%s", "?"), [compressor_code])
+        return rows[0] if rows else None
+
+    def known_codes(self):
+        return None
+
+    def close(self):
+        self._conn.close()
+
+
+@st.cache_resource
+def get_repository():
+    return PostgresRepository(db.get_pool())
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import psycopg2
+import streamlit as st
+
+import db
+import repository
+
+# Errors that mean "database unreachable" rather than "bad report"
+OUTAGE_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, db.PoolTimeout)
+
+
+def _parses(line):
+    try:
+        json.loads(line)
+    except ValueError:
+        return False
+    return True
+
+
+class Spool:
+    """Append-only JSON-lines file of records waiting to reach the database."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        self.rejected_path = self.path.with_suffix(".rejected.jsonl")
+        self._lock = threading.Lock()
+
+    def append(self, records):
+        data = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __len__(self):
+        with self._lock, open(self.path, "rb") as f:
+            return sum(1 for line in f if line.endswith(b"\n"))
+
+    def peek(self, limit):
+        """Return up to ``limit`` records and the byte offset just past them."""
+        records = []
+        offset = 0
+        with self._lock, open(self.path, "rb") as f:
+            for line in f:
+                if len(records) >= limit or not line.endswith(b"\n"):
+                    # A line without a newline is a torn write still in progress
+                    break
+                offset += len(line)
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Moved to rejected_path by discard()
+                    continue
+        return records, offset
+
+    def discard(self, offset):
+        # Drop everything before ``offset``; records appended since peek() survive
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with self._lock:
+            with open(self.path, "rb") as src, open(tmp, "wb") as dst:
+                unparseable = [line for line in src.read(offset).splitlines(keepends=True) if not _parses(line)]
+                if unparseable:
+                    # Kept as written, for recovery by hand
+                    with open(self.rejected_path, "ab") as rejected:
+                        rejected.writelines(unparseable)
+                        rejected.flush()
+                        os.fsync(rejected.fileno())
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp, self.path)
+
+
+class ReplayWorker:
+    """Background thread that flushes the spool once the database is reachable."""
+
+    def __init__(self, spool, repo, batch_size=500, interval=10.0):
+        self.spool = spool
+        self._repo = repo
+        self.batch_size = batch_size
+        self.interval = interval
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="spool-replay", daemon=True)
+        self._thread.start()
+
+    def replay(self):
+        # report_id makes re-inserting an already committed batch a no-op
+        replayed = 0
+        while True:
+            records, offset = self.spool.peek(self.batch_size)
+            if not offset:
+                return replayed
+            try:
+                self._repo.insert_many(records)
+            except OUTAGE_ERRORS:
+                raise
+            except repository.STORAGE_ERRORS:
+                self._insert_each(records)
+            self.spool.discard(offset)
+            db.reports_changed()
+            replayed += len(records)
+
+    def _insert_each(self, records):
+        # Isolate the record(s) the database refuses so they cannot block the spool
+        rejected = []
+        for record in records:
+            try:
+                self._repo.insert(record)
+            except OUTAGE_ERRORS:
+                raise
+            except repository.STORAGE_ERRORS:
+                rejected.append(record)
+        if rejected:
+            Spool(self.spool.rejected_path).append(rejected)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.replay()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+
+
+@st.cache_resource
+def get_spool():
+    settings = st.secrets.get("app", {})
+    spool = Spool(settings.get("spool_path", "spool/reports.jsonl"))
+    ReplayWorker(
+        spool,
+        repository.get_repository(),
+        batch_size=int(settings.get("spool_replay_batch_size", 500)),
+        interval=float(settings.get("spool_replay_interval", 10.0)),
+    )
+    return spool
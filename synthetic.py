@@ -0,0 +1,243 @@
+"""Generate realistic synthetic compressor reports for benchmarks and demos.
+
+    python synthetic.py --compressors 2000 --years 3 --copy
+    python synthetic.py --compressors 500 --years 1 --csv reports.csv
+    python synthetic.py --compressors 500 --years 1 --parquet reports.parquet
+
+One report per compressor per day, with
+- seasonal oil/motor temperatures and on-load hours (warmer in summer),
+- oil temperature drifting up between cleanings, "cleaning: not ok" in the
+  week before each cleaning,
+- fault episodes lasting a few days: overheating, low pressure, a failed fan
+  or an inverter fault,
+- a few missing days per compressor (--missing-rate).
+
+--copy registers the compressors as SIM0001, SIM0002, ... and streams the rows
+into the database with COPY, one transaction per chunk of compressors. The CSV
+has the bulk_import.py columns. The same --seed always gives the same data.
+"""
+import argparse
+import csv
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import db
+import migrate
+from bulk_import import COPY_COLUMNS, COPY_QUERY
+
+RATINGS_KW = (15, 22, 37, 55)
+SITES = ("North Plant", "South Plant", "East Plant", "West Plant")
+FAULTS = ("overheat", "low_pressure", "fan", "inverter")
+
+REGISTER_QUERY = """
+INSERT INTO compressors (code, rating_kw, site, line, model) VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT DO NOTHING
+"""
+
+
+def compressor_registry(count, seed=0):
+    rng = np.random.default_rng([seed, count])
+    return [
+        {
+            "code": f"SIM{index:04d}",
+            "rating_kw": int(rating),
+            "site": str(rng.choice(SITES)),
+            "line": f"Line {rng.integers(1, 9)}",
+            "model": f"{int(rating)}kW",
+        }
+        for index, rating in enumerate(rng.choice(RATINGS_KW, size=count), start=1)
+    ]
+
+
+def simulate(compressor, days, rng, missing_rate=0.02, fault_rate=3.0):
+    """One compressor's daily reports over ``days`` (a numpy datetime64[D] array)."""
+    n = len(days)
+    t = np.arange(n)
+    day_of_year = (days - days.astype("datetime64[Y]")).astype(int)
+    # Peaks in late July, lowest in late January
+    season = np.sin(2 * np.pi * (day_of_year - 110) / 365.25)
+
+    # Cleaning every 2-6 months; fouling raises the oil temperature until then
+    cleanings = np.cumsum(rng.integers(60, 181, size=n // 60 + 2)) - rng.integers(0, 60)
+    cycle = np.searchsorted(cleanings, t, side="right")
+    last_cleaning = np.where(cycle > 0, cleanings[np.maximum(cycle - 1, 0)], cleanings[0] - 120)
+    fouling = rng.uniform(0.02, 0.06) * (t - last_cleaning)
+    cleaning_due = cleanings[cycle] - t <= 7
+
+    ambient = rng.uniform(5, 12)
+    oil = rng.uniform(68, 82) + ambient * season + fouling + rng.normal(0, 1.5, n)
+    motor = rng.uniform(52, 66) + 0.7 * ambient * season + 0.4 * fouling + rng.normal(0, 1.5, n)
+    if rng.random() < 0.1:
+        # Slowly failing motor bearing: drifts for good
+        motor += rng.uniform(0.005, 0.02) * t
+    pressure = rng.uniform(0.65, 0.8) + rng.normal(0, 0.015, n)
+    on_load = rng.uniform(0.2, 0.7) * 24 + 1.5 * season + rng.normal(0, 1, n)
+
+    inverter_ok = np.ones(n, dtype=bool)
+    fan_ok = np.ones(n, dtype=bool)
+    status = np.full(n, f"{compressor['rating_kw']}kW Compressor Operational", dtype=object)
+    for _ in range(rng.poisson(fault_rate * n / 365.25)):
+        start = rng.integers(0, n)
+        window = slice(start, start + rng.integers(1, 11))
+        fault = rng.choice(FAULTS)
+        if fault == "overheat":
+            oil[window] += rng.uniform(12, 25)
+            motor[window] += rng.uniform(5, 12)
+        elif fault == "low_pressure":
+            pressure[window] -= rng.uniform(0.2, 0.35)
+        elif fault == "fan":
+            fan_ok[window] = False
+            oil[window] += 8
+        else:
+            inverter_ok[window] = False
+            on_load[window] *= 0.3
+            status[window] = "Stopped: inverter fault"
+
+    # Condensate builds up faster in humid summers
+    drain_ok = rng.random(n) >= 0.01 + 0.02 * np.maximum(season, 0)
+
+    frame = pd.DataFrame({
+        "report_date": days,
+        "compressor_code": compressor["code"],
+        "operational_status": status,
+        "oil_temperature": np.clip(np.rint(oil), 0, 200).astype(int),
+        "pressure": np.clip(pressure, 0, 2).round(2),
+        "on_load_total_time": (np.clip(on_load, 0, 24) * 4).round() / 4,
+        "motor_temperature": np.clip(np.rint(motor), 0, 200).astype(int),
+        "inverter_condition": np.where(inverter_ok, "ok", "not ok"),
+        "hmi_status": "Autoloadings on",
+        "compressor_fan": np.where(fan_ok, "ok", "not ok"),
+        "cleaning": np.where(cleaning_due, "not ok", "ok"),
+        "air_tank_water_drain": np.where(drain_ok, "ok", "not ok"),
+    }, columns=list(COPY_COLUMNS))
+    return frame[rng.random(n) >= missing_rate]
+
+
+def generate(registry, start, end, seed=0, chunk_size=100, **options):
+    """Yield DataFrames of reports, ``chunk_size`` compressors at a time."""
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    for offset in range(0, len(registry), chunk_size):
+        chunk = registry[offset:offset + chunk_size]
+        # Seeded per compressor, so the chunk size does not change the data
+        yield pd.concat(
+            [simulate(compressor, days, np.random.default_rng([seed, offset + i]), **options)
+             for i, compressor in enumerate(chunk)],
+            ignore_index=True,
+        )
+
+
+def to_csv_text(frame, header=False):
+    buffer = io.StringIO()
+    frame.to_csv(buffer, header=header, index=False, quoting=csv.QUOTE_MINIMAL, date_format="%Y-%m-%d")
+    return buffer
+
+
+def next_buffer(frames):
+    frame = next(frames, None)
+    if frame is None:
+        return None
+    buffer = to_csv_text(frame)
+    buffer.seek(0)
+    buffer.rows = len(frame)
+    return buffer
+
+
+def copy_frames(conn, registry, frames, start):
+    with conn.cursor() as cur:
+        cur.executemany(REGISTER_QUERY, [tuple(c.values()) for c in registry])
+        conn.commit()
+        if migrate.is_partitioned(cur):
+            # Old rows would otherwise all land in the default partition
+            migrate.ensure_partitions(conn, since=start)
+        with ThreadPoolExecutor(1) as executor:
+            # The next chunk is generated and formatted while the database loads this one
+            pending = executor.submit(next_buffer, frames)
+            while (buffer := pending.result()) is not None:
+                pending = executor.submit(next_buffer, frames)
+                cur.copy_expert(COPY_QUERY, buffer)
+                conn.commit()
+                yield buffer.rows
+
+
+def write_csv(path, frames):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write(",".join(COPY_COLUMNS) + "\n")
+        for frame in frames:
+            f.write(to_csv_text(frame).getvalue())
+            yield len(frame)
+
+
+def write_parquet(path, frames):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)") from None
+
+    writer = None
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            table = table.set_column(0, "report_date", table["report_date"].cast(pa.date32()))
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            yield len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--copy", action="store_true", help="COPY straight into the configured database")
+    output.add_argument("--csv", metavar="PATH")
+    output.add_argument("--parquet", metavar="PATH")
+    parser.add_argument("--compressors", type=int, default=1000)
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="last report date (default today)")
+    parser.add_argument("--missing-rate", type=float, default=0.02, help="share of days without a report")
+    parser.add_argument("--fault-rate", type=float, default=3.0, help="fault episodes per compressor per year")
+    parser.add_argument("--chunk-size", type=int, default=100, help="compressors per chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = args.end - timedelta(days=round(args.years * 365.25) - 1)
+    registry = compressor_registry(args.compressors, args.seed)
+    frames = generate(
+        registry, start, args.end, args.seed, args.chunk_size,
+        missing_rate=args.missing_rate, fault_rate=args.fault_rate,
+    )
+
+    started = time.perf_counter()
+    if args.copy:
+        conn = db.connect()
+        written = copy_frames(conn, registry, frames, start)
+    elif args.csv:
+        written = write_csv(args.csv, frames)
+    else:
+        written = write_parquet(args.parquet, frames)
+
+    total = 0
+    try:
+        for rows in written:
+            total += rows
+            elapsed = time.perf_counter() - started
+            print(f"\r{total:,} rows, {total / elapsed * 60:,.0f} rows/min", end="", file=sys.stderr)
+    finally:
+        if args.copy:
+            conn.close()
+    print(file=sys.stderr)
+    print(f"Wrote {total:,} reports for {len(registry)} compressors, {start} to {args.end}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
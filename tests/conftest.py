@@ -0,0 +1,39 @@
+from datetime import date
+
+import pytest
+
+from validation import submission_id, validate_record
+
+NONCE = "00000000-0000-4000-8000-000000000000"
+
+
+def raw_report(**fields):
+    """A form submission inside every limit; ``fields`` override it."""
+    return {
+        "report_date": "2024-03-01",
+        "compressor_code": "1008",
+        "operational_status": "15kW Compressor Operational",
+        "oil_temperature": 75,
+        "pressure": 0.72,
+        "on_load_total_time": "4:30",
+        "motor_temperature": 60,
+        "inverter_condition": "ok",
+        "hmi_status": "Autoloadings on",
+        "compressor_fan": "ok",
+        "cleaning": "ok",
+        "air_tank_water_drain": "ok",
+        **fields,
+    }
+
+
+def make_record(**fields):
+    """A validated record with a report_id, as the form inserts it."""
+    record = validate_record(raw_report(**fields))
+    record.setdefault("report_id", submission_id(NONCE, record))
+    return record
+
+
+@pytest.fixture
+def records():
+    # One report per day for a week, newest last
+    return [make_record(report_date=date(2024, 3, day).isoformat()) for day in range(1, 8)]
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import sqlite3
+from datetime import date
+
+import psycopg2
+from aiohttp.test_utils import TestClient, TestServer
+
+import api
+from conftest import raw_report
+from repository import SQLiteRepository
+
+
+class CountingRepository(SQLiteRepository):
+    """Counts INSERT round trips; refuses reports for ``refused`` codes or all of them while ``down``."""
+
+    def __init__(self, refused=()):
+        super().__init__()
+        self.refused = set(refused)
+        self.down = False
+        self.calls = 0
+
+    def insert_many(self, records):
+        self.calls += 1
+        if self.down:
+            raise psycopg2.OperationalError("could not connect to server")
+        if any(record["compressor_code"] in self.refused for record in records):
+            raise sqlite3.IntegrityError("refused")
+        return super().insert_many(records)
+
+
+def run(repo, scenario):
+    """Run ``scenario(client)`` against the API app on ``repo``; returns its result."""
+    async def main():
+        async with TestClient(TestServer(api.create_app(repo))) as client:
+            return await scenario(client)
+    return asyncio.run(main())
+
+
+def report(day=1, **fields):
+    return raw_report(report_date=f"2024-03-{day:02d}", **fields)
+
+
+def test_health():
+    async def scenario(client):
+        response = await client.get("/health")
+        return response.status, await response.json()
+
+    assert run(CountingRepository(), scenario) == (200, {"status": "ok"})
+
+
+def test_post_one_and_many():
+    async def scenario(client):
+        one = await client.post("/reports", json=report())
+        many = await client.post("/reports", json=[report(day) for day in range(2, 5)])
+        return one.status, await one.json(), many.status, await many.json()
+
+    one_status, one, many_status, many = run(CountingRepository(), scenario)
+    assert (one_status, one["accepted"], one["inserted"], one["rejected"]) == (200, 1, 1, [])
+    assert (many_status, many["accepted"], many["inserted"]) == (200, 3, 3)
+    assert len(set(many["report_ids"])) == 3
+
+
+def test_duplicate_report_id_is_not_inserted_twice():
+    payload = report(report_id="8d3a7e1c-1111-4222-8333-944455556666")
+
+    async def scenario(client):
+        first = await (await client.post("/reports", json=payload)).json()
+        retry = await (await client.post("/reports", json=payload)).json()
+        return first, retry
+
+    first, retry = run(CountingRepository(), scenario)
+    assert first["inserted"] == 1
+    assert retry["accepted"] == 1 and retry["inserted"] == 0
+    assert retry["report_ids"] == first["report_ids"]
+
+
+def test_concurrent_posts_share_inserts():
+    repo = CountingRepository()
+
+    async def scenario(client):
+        responses = await asyncio.gather(*(client.post("/reports", json=report(day)) for day in range(1, 21)))
+        return [(await response.json())["inserted"] for response in responses]
+
+    assert run(repo, scenario) == [1] * 20
+    assert repo.calls < 20
+
+
+def test_refused_report_does_not_fail_the_batch():
+    repo = CountingRepository(refused={"BAD"})
+
+    async def scenario(client):
+        good, _ = await asyncio.gather(
+            client.post("/reports", json=[report(1), report(2)]),
+            client.post("/reports", json=report(3, compressor_code="BAD")),
+        )
+        return good.status, await good.json()
+
+    status, good = run(repo, scenario)
+    assert (status, good["inserted"]) == (200, 2)
+    assert repo.history("1008", date(2024, 3, 1), date(2024, 3, 31))[-1]["report_date"] == date(2024, 3, 1)
+
+
+def test_outage_is_503():
+    repo = CountingRepository()
+    repo.down = True
+
+    async def scenario(client):
+        response = await client.post("/reports", json=report())
+        return response.status, await response.text()
+
+    status, text = run(repo, scenario)
+    assert status == 503
+    assert "retry with the same report_id" in text
+
+
+class RegistryRepository(CountingRepository):
+    """Known codes come from a registry that can be unreachable while inserts still work."""
+
+    def __init__(self, codes):
+        super().__init__()
+        self.codes = set(codes)
+        self.registry_down = False
+
+    def known_codes(self):
+        if self.registry_down:
+            raise psycopg2.OperationalError("could not connect to server")
+        return self.codes
+
+
+def test_outage_on_code_lookup_is_503():
+    repo = RegistryRepository({"1008"})
+    repo.registry_down = True
+
+    async def scenario(client):
+        response = await client.post("/reports", json=report())
+        return response.status, await response.text()
+
+    status, text = run(repo, scenario)
+    assert status == 503
+    assert "retry with the same report_id" in text
+
+
+def test_outage_on_code_refresh_uses_last_known_codes():
+    repo = RegistryRepository({"1008"})
+
+    async def scenario(client):
+        await client.post("/reports", json=report(1))
+        repo.registry_down = True
+        client.app["codes"].ttl = 0
+        good = await client.post("/reports", json=report(2))
+        unknown = await client.post("/reports", json=report(3, compressor_code="9999"))
+        return good.status, unknown.status, (await unknown.json())["rejected"]
+
+    good, unknown, rejected = run(repo, scenario)
+    assert (good, unknown) == (200, 422)
+    assert "is not registered" in rejected[0]["error"]
+
+
+def test_bad_requests_are_400():
+    async def scenario(client):
+        statuses = []
+        for body in ("not json", json.dumps([]), json.dumps([report()] * (api.MAX_REPORTS_PER_REQUEST + 1))):
+            response = await client.post("/reports", data=body, headers={"Content-Type": "application/json"})
+            statuses.append(response.status)
+        return statuses
+
+    assert run(CountingRepository(), scenario) == [400, 400, 400]
+
+
+def test_invalid_reports_are_422():
+    repo = CountingRepository()
+
+    async def scenario(client):
+        response = await client.post("/reports", json=[report(pressure=9), "not an object"])
+        return response.status, await response.json()
+
+    status, body = run(repo, scenario)
+    assert status == 422
+    assert body["accepted"] == 0
+    assert [rejected["index"] for rejected in body["rejected"]] == [0, 1]
+    assert body["rejected"][0]["error"].startswith("pressure:")
+    assert repo.calls == 0
+
+
+def test_partly_invalid_request_stores_the_valid_reports():
+    async def scenario(client):
+        response = await client.post("/reports", json=[report(1), report(2, oil_temperature="hot")])
+        return response.status, await response.json()
+
+    status, body = run(CountingRepository(), scenario)
+    assert status == 200
+    assert (body["accepted"], body["inserted"]) == (1, 1)
+    assert body["rejected"][0]["index"] == 1
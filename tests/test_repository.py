@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+
+from conftest import make_record
+from repository import SQLiteRepository
+
+
+@pytest.fixture
+def repo():
+    repo = SQLiteRepository()
+    yield repo
+    repo.close()
+
+
+def test_insert_skips_duplicates(repo):
+    record = make_record()
+    assert repo.insert(record) is True
+    assert repo.insert(record) is False
+    other = make_record(oil_temperature=80)
+    assert repo.insert_many([record, other]) == {other["report_id"]}
+
+
+def test_insert_many_returns_new_ids(repo, records):
+    assert repo.insert_many(records[:3]) == {record["report_id"] for record in records[:3]}
+    assert repo.insert_many(records) == {record["report_id"] for record in records[3:]}
+
+
+def test_history_pages(repo, records):
+    repo.insert_many(records)
+    start, end = date(2024, 3, 1), date(2024, 3, 31)
+
+    first = repo.history("1008", start, end, limit=3)
+    assert [row["report_date"].day for row in first] == [7, 6, 5]
+
+    after = (first[-1]["report_date"], first[-1]["report_id"])
+    second = repo.history("1008", start, end, after=after, limit=3)
+    assert [row["report_date"].day for row in second] == [4, 3, 2]
+
+    after = (second[-1]["report_date"], second[-1]["report_id"])
+    assert [row["report_date"].day for row in repo.history("1008", start, end, after=after, limit=3)] == [1]
+
+
+def test_history_filters(repo, records):
+    repo.insert_many(records + [make_record(compressor_code="2001")])
+    assert [row["report_date"].day for row in repo.history("1008", date(2024, 3, 2), date(2024, 3, 3))] == [3, 2]
+    assert len(repo.history("2001", date(2024, 3, 1), date(2024, 3, 31))) == 1
+    assert repo.history("9999", date(2024, 3, 1), date(2024, 3, 31)) == []
+
+
+def test_latest(repo, records):
+    assert repo.latest("1008") is None
+    repo.insert_many(records)
+    latest = repo.latest("1008")
+    assert latest["report_date"] == date(2024, 3, 7)
+    assert latest["oil_temperature"] == 75
+
+
+def test_file_database_persists(tmp_path, records):
+    path = tmp_path / "reports.db"
+    repo = SQLiteRepository(str(path))
+    repo.insert_many(records)
+    repo.close()
+
+    reopened = SQLiteRepository(str(path))
+    try:
+        assert reopened.insert_many(records) == set()
+        assert reopened.known_codes() is None
+    finally:
+        reopened.close()
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from spool import Spool
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return Spool(tmp_path / "reports.jsonl")
+
+
+def test_peek_and_discard(spool):
+    spool.append([{"n": 1}, {"n": 2}, {"n": 3}])
+    assert len(spool) == 3
+
+    records, offset = spool.peek(2)
+    assert records == [{"n": 1}, {"n": 2}]
+    # Nothing is removed until discard()
+    assert spool.peek(10)[0] == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+    spool.discard(offset)
+    assert spool.peek(10)[0] == [{"n": 3}]
+    assert len(spool) == 1
+
+
+def test_discard_keeps_records_appended_after_peek(spool):
+    spool.append([{"n": 1}])
+    records, offset = spool.peek(10)
+    spool.append([{"n": 2}])
+    spool.discard(offset)
+    assert spool.peek(10)[0] == [{"n": 2}]
+
+
+def test_peek_stops_at_torn_line(spool):
+    spool.append([{"n": 1}])
+    with open(spool.path, "a", encoding="utf-8") as f:
+        f.write('{"n": 2')
+    assert len(spool) == 1
+
+    records, offset = spool.peek(10)
+    assert records == [{"n": 1}]
+    spool.discard(offset)
+    # The half-written line stays until its writer finishes it
+    assert spool.path.read_text(encoding="utf-8") == '{"n": 2'
+
+
+def test_discard_moves_unparseable_lines_to_rejected(spool):
+    spool.append([{"n": 1}])
+    with open(spool.path, "a", encoding="utf-8") as f:
+        f.write("not json\n")
+    spool.append([{"n": 2}])
+
+    records, offset = spool.peek(10)
+    assert records == [{"n": 1}, {"n": 2}]
+    spool.discard(offset)
+
+    assert spool.peek(10)[0] == []
+    assert spool.rejected_path.read_text(encoding="utf-8") == "not json\n"
+
+
+def test_append_serializes_dates(spool, records):
+    spool.append(records[:1])
+    assert spool.peek(1)[0] == [json.loads(json.dumps(records[0], default=str))]
@@ -0,0 +1,80 @@
+from datetime import date, datetime
+
+import pytest
+
+from conftest import NONCE, raw_report
+from validation import parse_hours, submission_id, validate_record
+
+
+@pytest.mark.parametrize("value, hours", [
+    ("04", 4.0),
+    ("4.5", 4.5),
+    ("4:30", 4.5),
+    (" 12 : 15 ", 12.25),
+    (8, 8.0),
+    (2.75, 2.75),
+])
+def test_parse_hours(value, hours):
+    assert parse_hours(value) == hours
+
+
+@pytest.mark.parametrize("value", ["", "four", "4:30:00", "-1", "4,5"])
+def test_parse_hours_rejects(value):
+    with pytest.raises(ValueError):
+        parse_hours(value)
+
+
+def test_validate_record_normalizes():
+    record = validate_record(raw_report(
+        report_date=datetime(2024, 3, 1, 7, 45),
+        compressor_code=" 1008 ",
+        oil_temperature="75.0",
+        pressure="0.724",
+        cleaning=" Not OK ",
+        hmi_status=None,
+    ))
+    assert record["report_date"] == date(2024, 3, 1)
+    assert record["compressor_code"] == "1008"
+    assert record["oil_temperature"] == 75
+    assert record["pressure"] == 0.72
+    assert record["on_load_total_time"] == 4.5
+    assert record["cleaning"] == "not ok"
+    assert record["hmi_status"] == ""
+    assert "report_id" not in record
+
+
+def test_validate_record_lists_every_problem():
+    with pytest.raises(ValueError) as excinfo:
+        validate_record(raw_report(
+            report_date="yesterday",
+            compressor_code="  ",
+            oil_temperature=75.5,
+            motor_temperature=250,
+            pressure="high",
+            on_load_total_time="n/a",
+            compressor_fan="broken",
+        ))
+    errors = str(excinfo.value).split("; ")
+    assert [error.split(":")[0] for error in errors] == [
+        "report_date", "compressor_code", "oil_temperature", "motor_temperature", "pressure",
+        "on_load_total_time", "compressor_fan",
+    ]
+
+
+def test_validate_record_checks_limits():
+    with pytest.raises(ValueError, match="pressure: 2.5 outside 0.0-2.0"):
+        validate_record(raw_report(pressure=2.5))
+
+
+def test_validate_record_report_id():
+    report_id = "8d3a7e1c-1111-4222-8333-944455556666"
+    assert validate_record(raw_report(report_id=report_id.upper()))["report_id"] == report_id
+    with pytest.raises(ValueError, match="report_id: expected a UUID"):
+        validate_record(raw_report(report_id="42"))
+
+
+def test_submission_id_is_deterministic():
+    record = validate_record(raw_report())
+    assert submission_id(NONCE, record) == submission_id(NONCE, {**record, "report_id": "ignored"})
+    assert submission_id(NONCE, record) != submission_id(NONCE, {**record, "oil_temperature": 76})
+    assert submission_id(NONCE, record) != submission_id("00000000-0000-4000-8000-000000000001", record)
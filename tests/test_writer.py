@@ -0,0 +1,110 @@
+import sqlite3
+import time
+
+import psycopg2
+import pytest
+
+import writer
+from conftest import make_record
+from repository import SQLiteRepository
+from spool import Spool
+
+
+class FlakyRepository(SQLiteRepository):
+    """Refuses reports for ``refused`` codes; raises an outage while ``down`` is set."""
+
+    def __init__(self, refused=()):
+        super().__init__()
+        self.refused = set(refused)
+        self.down = False
+        self.calls = []
+
+    def insert_many(self, records):
+        self.calls.append(len(records))
+        if self.down:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        if any(record["compressor_code"] in self.refused for record in records):
+            raise sqlite3.IntegrityError("refused")
+        return super().insert_many(records)
+
+
+def wait_for(report_writer, tickets, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while any(report_writer.status(ticket)[0] == writer.QUEUED for ticket in tickets):
+        assert time.monotonic() < deadline, "writer did not finish"
+        time.sleep(0.01)
+    return [report_writer.status(ticket) for ticket in tickets]
+
+
+def test_batches_are_written():
+    repo = FlakyRepository()
+    report_writer = writer.ReportWriter(repo, batch_size=50, linger=0.2)
+    records = [make_record(oil_temperature=60 + i) for i in range(10)]
+    states = wait_for(report_writer, [report_writer.submit(record) for record in records])
+
+    assert states == [(writer.WRITTEN, None)] * 10
+    assert repo.calls == [10]
+    assert repo.insert_many(records) == set()
+
+
+def test_refused_record_fails_alone():
+    repo = FlakyRepository(refused={"BAD"})
+    report_writer = writer.ReportWriter(repo, batch_size=50, linger=0.2)
+    codes = ["1008", "BAD", "2001"]
+    states = wait_for(report_writer, [report_writer.submit(make_record(compressor_code=code)) for code in codes])
+
+    assert states == [(writer.WRITTEN, None), (writer.FAILED, "refused"), (writer.WRITTEN, None)]
+    # One batch, then one insert per record
+    assert repo.calls == [3, 1, 1, 1]
+
+
+def test_outage_spools_batch(tmp_path):
+    repo = FlakyRepository()
+    repo.down = True
+    offline = Spool(tmp_path / "reports.jsonl")
+    report_writer = writer.ReportWriter(repo, offline_spool=offline, batch_size=50, linger=0.2)
+    tickets = [report_writer.submit(make_record(oil_temperature=60 + i)) for i in range(3)]
+
+    assert wait_for(report_writer, tickets) == [(writer.SPOOLED, None)] * 3
+    assert len(offline) == 3
+
+
+def test_outage_without_spool_fails():
+    repo = FlakyRepository()
+    repo.down = True
+    report_writer = writer.ReportWriter(repo, linger=0.05)
+    [(state, error)] = wait_for(report_writer, [report_writer.submit(make_record())])
+
+    assert state == writer.FAILED
+    assert "server closed the connection" in error
+
+
+@pytest.mark.parametrize("ticket", ["never-issued", None])
+def test_unknown_ticket(ticket):
+    report_writer = writer.ReportWriter(FlakyRepository())
+    assert report_writer.status(ticket) == (writer.UNKNOWN, None)
+
+
+def test_evicted_ticket_is_unknown():
+    report_writer = writer.ReportWriter(FlakyRepository(), linger=0.05, max_tracked=2)
+    tickets = [report_writer.submit(make_record(oil_temperature=60 + i)) for i in range(3)]
+    wait_for(report_writer, tickets[1:])
+
+    assert report_writer.status(tickets[0]) == (writer.UNKNOWN, None)
+    assert report_writer.status(tickets[2]) == (writer.WRITTEN, None)
+
+
+def test_spool_failure_fails_batch_and_keeps_writing(tmp_path):
+    class BrokenSpool(Spool):
+        def append(self, records):
+            raise OSError("No space left on device")
+
+    repo = FlakyRepository()
+    repo.down = True
+    report_writer = writer.ReportWriter(repo, offline_spool=BrokenSpool(tmp_path / "reports.jsonl"), linger=0.05)
+    [(state, error)] = wait_for(report_writer, [report_writer.submit(make_record())])
+    assert (state, error) == (writer.FAILED, "No space left on device")
+
+    repo.down = False
+    assert wait_for(report_writer, [report_writer.submit(make_record(oil_temperature=80))]) == [(writer.WRITTEN, None)]
+    assert report_writer._thread.is_alive()
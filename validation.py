@@ -0,0 +1,123 @@
+import json
+import re
+import uuid
+from datetime import date, datetime
+
+# Same limits as the widgets in compressor_form
+CONDITION_OPTIONS = ["ok", "not ok"]
+TEMPERATURE_RANGE = (0, 200)
+PRESSURE_RANGE = (0.0, 2.0)
+ON_LOAD_HOURS_RANGE = (0.0, 99999.99)
+
+# "04", "4.5" or "4:30" (hours:minutes), as written in the paper logs
+HOURS_PATTERN = r"^\s*(\d+(?:\.\d+)?)\s*(?::\s*(\d{1,2}))?\s*$"
+
+CONDITION_FIELDS = ("inverter_condition", "compressor_fan", "cleaning", "air_tank_water_drain")
+TEXT_FIELDS = ("operational_status", "hmi_status")
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+def parse_hours(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.fullmatch(HOURS_PATTERN, str(value))
+    if match is None:
+        raise ValueError
+    return float(match[1]) + float(match[2] or 0) / 60
+
+
+def _parse_int(value):
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError
+    return int(number)
+
+
+def validate_record(raw):
+    """Return a clean report record, or raise ValueError listing every problem."""
+    record = {}
+    errors = []
+
+    try:
+        record["report_date"] = _parse_date(raw.get("report_date"))
+    except (TypeError, ValueError):
+        errors.append(f"report_date: invalid date {raw.get('report_date')!r}")
+
+    code = raw.get("compressor_code")
+    if _blank(code):
+        errors.append("compressor_code: required")
+    else:
+        record["compressor_code"] = str(code).strip()
+
+    for field in TEXT_FIELDS:
+        value = raw.get(field)
+        record[field] = "" if value is None else str(value).strip()
+
+    for field in ("oil_temperature", "motor_temperature"):
+        low, high = TEMPERATURE_RANGE
+        try:
+            value = _parse_int(raw.get(field))
+        except (TypeError, ValueError):
+            errors.append(f"{field}: expected a whole number, got {raw.get(field)!r}")
+            continue
+        if not low <= value <= high:
+            errors.append(f"{field}: {value} outside {low}-{high}")
+        record[field] = value
+
+    low, high = PRESSURE_RANGE
+    try:
+        pressure = round(float(raw.get("pressure")), 2)
+    except (TypeError, ValueError):
+        errors.append(f"pressure: expected a number, got {raw.get('pressure')!r}")
+    else:
+        if not low <= pressure <= high:
+            errors.append(f"pressure: {pressure} outside {low}-{high}")
+        record["pressure"] = pressure
+
+    low, high = ON_LOAD_HOURS_RANGE
+    try:
+        hours = round(parse_hours(raw.get("on_load_total_time")), 2)
+    except (TypeError, ValueError):
+        errors.append(f"on_load_total_time: expected hours, got {raw.get('on_load_total_time')!r}")
+    else:
+        if not low <= hours <= high:
+            errors.append(f"on_load_total_time: {hours} outside {low}-{high}")
+        record["on_load_total_time"] = hours
+
+    for field in CONDITION_FIELDS:
+        value = str(raw.get(field) or "").strip().lower()
+        if value not in CONDITION_OPTIONS:
+            errors.append(f"{field}: expected one of {CONDITION_OPTIONS}, got {raw.get(field)!r}")
+        record[field] = value
+
+    if raw.get("report_id"):
+        try:
+            record["report_id"] = str(uuid.UUID(str(raw["report_id"])))
+        except ValueError:
+            errors.append(f"report_id: expected a UUID, got {raw['report_id']!r}")
+
+    if errors:
+        raise ValueError("; ".join(errors))
+    return record
+
+
+def submission_id(nonce, record):
+    """Deterministic report_id for a form session.
+
+    Re-submitting identical content from the same session (a double click, or
+    a rerun after a slow commit) yields the same id, which the database then
+    ignores via ON CONFLICT.
+    """
+    content = {key: value for key, value in record.items() if key != "report_id"}
+    return str(uuid.uuid5(uuid.UUID(nonce), json.dumps(content, default=str, sort_keys=True)))
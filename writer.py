@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import streamlit as st
+
+import db
+import repository
+import spool
+
+QUEUED = "queued"
+WRITTEN = "written"
+SPOOLED = "spooled"
+FAILED = "failed"
+# The ticket was never issued, or aged out of tracking after max_tracked newer submissions
+UNKNOWN = "unknown"
+
+
+class ReportWriter:
+    """Write-behind queue: reports are inserted by a background thread.
+
+    Pending records are grouped into multi-row INSERTs of up to ``batch_size``
+    rows, waiting at most ``linger`` seconds for a batch to fill up.
+    """
+
+    def __init__(self, repo, offline_spool=None, batch_size=200, linger=0.5, max_tracked=10000):
+        self._repo = repo
+        self._spool = offline_spool
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_tracked = max_tracked
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._status = OrderedDict()
+        self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        ticket = uuid.uuid4().hex
+        self._set_status(ticket, (QUEUED, None))
+        self._queue.put((ticket, record))
+        return ticket
+
+    def status(self, ticket):
+        # (state, error message)
+        with self._lock:
+            return self._status.get(ticket, (UNKNOWN, None))
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _set_status(self, ticket, status):
+        with self._lock:
+            self._status[ticket] = status
+            self._status.move_to_end(ticket)
+            while len(self._status) > self.max_tracked:
+                self._status.popitem(last=False)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _fail(self, batch, error):
+        for ticket, _ in batch:
+            self._set_status(ticket, (FAILED, str(error)))
+
+    def _spool_or_fail(self, batch, error):
+        if self._spool is None:
+            self._fail(batch, error)
+            return
+        self._spool.append([record for _, record in batch])
+        for ticket, _ in batch:
+            self._set_status(ticket, (SPOOLED, None))
+
+    def _written(self, batch):
+        db.reports_changed()
+        for ticket, _ in batch:
+            self._set_status(ticket, (WRITTEN, None))
+
+    def _insert_each(self, batch):
+        # Isolate the record(s) the database refuses so they cannot fail the rest of the batch
+        written = []
+        for ticket, record in batch:
+            try:
+                self._repo.insert(record)
+            except spool.OUTAGE_ERRORS as e:
+                self._spool_or_fail([(ticket, record)], e)
+            except Exception as e:
+                self._set_status(ticket, (FAILED, str(e)))
+            else:
+                written.append((ticket, record))
+        if written:
+            self._written(written)
+
+    def _write(self, batch):
+        try:
+            self._repo.insert_many([record for _, record in batch])
+        except spool.OUTAGE_ERRORS as e:
+            self._spool_or_fail(batch, e)
+        except Exception:
+            self._insert_each(batch)
+        else:
+            self._written(batch)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._write(batch)
+            except Exception as e:
+                # e.g. the spool cannot be written; the thread must survive for the next batch
+                with self._lock:
+                    pending = [item for item in batch if self._status.get(item[0], (None,))[0] == QUEUED]
+                self._fail(pending, e)
+
+
+@st.cache_resource
+def get_writer():
+    settings = st.secrets.get("app", {})
+    return ReportWriter(
+        repository.get_repository(),
+        offline_spool=spool.get_spool(),
+        batch_size=int(settings.get("write_batch_size", 200)),
+        linger=float(settings.get("write_linger", 0.5)),
+    )